@@ -1,43 +1,45 @@
 """LAN Party Stats Bot - Main Entry Point."""
 
 import asyncio
+import atexit
 import os
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from dotenv import load_dotenv
+import dotenv
 import sys
 
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from bot import run_bot
-
 
 def setup_logging():
     """Configure logging for the bot."""
     # Custom formatter for clean, readable output
     class CleanFormatter(logging.Formatter):
         """Custom formatter with colors and clean layout."""
-        
-        COLORS = {
-            'DEBUG': '\033[36m',      # Cyan
-            'INFO': '\033[32m',       # Green
-            'WARNING': '\033[33m',    # Yellow
-            'ERROR': '\033[31m',      # Red
-            'CRITICAL': '\033[35m',   # Magenta
+
+        # Colored level strings precomputed once so format() is a dict lookup
+        # (cyan/green/yellow/red/magenta for DEBUG..CRITICAL)
+        LEVEL_PREFIXES = {
+            level: f"\033[{code}m{level:<8}\033[0m"
+            for level, code in [
+                ('DEBUG', '36'), ('INFO', '32'), ('WARNING', '33'),
+                ('ERROR', '31'), ('CRITICAL', '35'),
+            ]
         }
         RESET = '\033[0m'
         BOLD = '\033[1m'
-        
+
         def format(self, record):
             logger_name = record.name.replace('bot.', '')
-            level_color = self.COLORS.get(record.levelname, '')
-            level = f"{level_color}{record.levelname:<8}{self.RESET}"
+            level = self.LEVEL_PREFIXES.get(record.levelname, f"{record.levelname:<8}")
             timestamp = self.formatTime(record, '%H:%M:%S')
             msg = f"{self.BOLD}{timestamp}{self.RESET} {level} {logger_name:<12} {record.getMessage()}"
-            
+
             if record.exc_info:
                 msg += '\n' + self.formatException(record.exc_info)
-            
+
             return msg
     
     file_formatter = logging.Formatter(
@@ -48,14 +50,25 @@ def setup_logging():
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(CleanFormatter())
     
-    file_handler = logging.FileHandler('bot.log')
+    # delay=True defers opening the file until the first record; rotation
+    # keeps the log bounded on long-running bots
+    file_handler = RotatingFileHandler(
+        'bot.log', maxBytes=5_000_000, backupCount=3, delay=True, encoding='utf-8'
+    )
     file_handler.setFormatter(file_formatter)
     
+    # Route records through a queue so console/file writes happen on a
+    # background thread instead of blocking the event loop
+    log_queue = queue.SimpleQueue()
+
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
     root_logger.handlers.clear()
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     
     # Reduce discord.py verbosity
     logging.getLogger('discord').setLevel(logging.WARNING)
@@ -64,10 +77,22 @@ def setup_logging():
     logging.getLogger('discord.http').setLevel(logging.WARNING)
 
 
+def install_uvloop():
+    """Install uvloop as the event loop policy when available (not on Windows)."""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+
 def main():
     setup_logging()
-    load_dotenv()
-    
+    dotenv.load_dotenv()
+    install_uvloop()
+
     logger = logging.getLogger('main')
     
     token = os.getenv("DISCORD_TOKEN")
@@ -80,16 +105,20 @@ def main():
     
     guild_id_int = int(guild_id) if guild_id else None
     if guild_id_int:
-        logger.info(f"Starting LAN Party Stats Bot (db: {db_path}, guild: {guild_id_int})")
+        logger.info("Starting LAN Party Stats Bot (db: %s, guild: %s)", db_path, guild_id_int)
     else:
-        logger.info(f"Starting LAN Party Stats Bot (db: {db_path}, monitoring all guilds)")
+        logger.info("Starting LAN Party Stats Bot (db: %s, monitoring all guilds)", db_path)
     
     try:
+        # Imported here so the missing-token error path above exits without
+        # paying for discord.py and friends
+        from bot import run_bot
+
         asyncio.run(run_bot(token, db_path, guild_id_int))
     except KeyboardInterrupt:
         pass
     except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
+        logger.error("Fatal error: %s", e, exc_info=True)
         return 1
     
     logger.info("Bot shutdown complete - exiting")
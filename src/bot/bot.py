@@ -1,11 +1,16 @@
 """Discord bot main module."""
 
+from __future__ import annotations
+
 import discord
 from discord.ext import commands
+import hashlib
+import json
 import logging
 import signal
 import sys
 import asyncio
+from pathlib import Path
 from typing import Optional
 
 from .database import Database
@@ -16,9 +21,30 @@ from .commands import setup as setup_commands
 logger = logging.getLogger(__name__)
 
 
+def _activity_signature(activities) -> tuple:
+    """Build a comparable fingerprint of a member's activities.
+
+    title/artist are included so Spotify track changes are visible —
+    Spotify activities always report name == "Spotify".
+    """
+    return tuple(
+        (a.type, getattr(a, 'application_id', None), getattr(a, 'name', None),
+         getattr(a, 'title', None), getattr(a, 'artist', None))
+        for a in activities
+    )
+
+
 class LanPartyBot(commands.Bot):
     """The main bot class."""
 
+    # Slot the hot attributes accessed on every presence event; the base
+    # class still provides a __dict__ for everything discord.py sets itself
+    __slots__ = (
+        'db', 'tracker', 'stats_manager', '_shutdown',
+        '_db_path', '_guild_id', '_presence_q', '_presence_task',
+        '_mv_task',
+    )
+
     def __init__(self, *args, db_path: str = "stats.db", guild_id: Optional[int] = None, **kwargs):
         super().__init__(*args, **kwargs)
         self.db: Optional[Database] = None
@@ -27,6 +53,9 @@ class LanPartyBot(commands.Bot):
         self._shutdown = False
         self._db_path = db_path
         self._guild_id = guild_id
+        self._presence_q: Optional[asyncio.Queue] = None
+        self._presence_task: Optional[asyncio.Task] = None
+        self._mv_task: Optional[asyncio.Task] = None
 
     async def setup_hook(self):
         """Initialize database, components, and sync commands."""
@@ -40,21 +69,64 @@ class LanPartyBot(commands.Bot):
             self.stats_manager = StatsManager(self.db)
             logger.info("Tracker and stats manager ready")
             
+            self._presence_q = asyncio.Queue()
+            self._presence_task = asyncio.create_task(self._drain_presence())
+            self._mv_task = asyncio.create_task(self._refresh_leaderboard_loop())
+
             await setup_commands(self, self.stats_manager)
-            synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} commands")
+            await self._sync_commands()
         except Exception as e:
-            logger.error(f"Setup failed: {e}", exc_info=True)
+            logger.error("Setup failed: %s", e, exc_info=True)
             raise
 
         logger.info("Bot ready")
 
+    def _command_tree_hash(self) -> str:
+        """Compute a stable fingerprint of the local command tree."""
+        guild = discord.Object(id=self._guild_id) if self._guild_id else None
+        commands_in_scope = list(self.tree.get_commands()) + (
+            list(self.tree.get_commands(guild=guild)) if guild else []
+        )
+        tree = [
+            (cmd.name, cmd.description, [(p.name, p.type.value) for p in getattr(cmd, 'parameters', [])])
+            for cmd in commands_in_scope
+        ]
+        payload = json.dumps([self._guild_id, tree], sort_keys=True)
+        return hashlib.blake2b(payload.encode()).hexdigest()
+
+    async def _sync_commands(self):
+        """Sync the command tree, skipping the API round-trip when unchanged.
+
+        Global syncs are rate-limited and slow; when a guild is configured,
+        a guild-scoped sync is used instead so commands propagate instantly.
+        The tree fingerprint is persisted next to the database so unchanged
+        restarts skip the sync entirely.
+        """
+        tree_hash = self._command_tree_hash()
+        hash_path = Path(f"{self._db_path}.cmdhash")
+
+        if hash_path.exists() and hash_path.read_text().strip() == tree_hash:
+            logger.info("Command tree unchanged, skipping sync")
+            return
+
+        if self._guild_id:
+            guild = discord.Object(id=self._guild_id)
+            self.tree.copy_global_to(guild=guild)
+            synced = await self.tree.sync(guild=guild)
+        else:
+            synced = await self.tree.sync()
+
+        hash_path.write_text(tree_hash)
+        logger.info("Synced %d commands", len(synced))
+
     async def on_ready(self):
         """Called when the bot is ready and connected to Discord."""
         guild_text = f"{len(self.guilds)} guild(s)" if len(self.guilds) != 1 else "1 guild"
-        logger.info(f"Connected as {self.user} | {guild_text}")
-        if self._guild_id and self._guild_id not in [g.id for g in self.guilds]:
-            logger.warning(f"Configured guild ID {self._guild_id} not found! Bot is in guilds: {[g.id for g in self.guilds]}")
+        logger.info("Connected as %s | %s", self.user, guild_text)
+        if self._guild_id:
+            guild_ids = [g.id for g in self.guilds]
+            if self._guild_id not in guild_ids:
+                logger.warning("Configured guild ID %s not found! Bot is in guilds: %s", self._guild_id, guild_ids)
         if self.tracker:
             await self.tracker.initialize_from_current_state(self, self._guild_id)
 
@@ -63,16 +135,57 @@ class LanPartyBot(commands.Bot):
         # Only track if guild_id is not set or matches the configured guild
         if self._guild_id and after.guild.id != self._guild_id:
             return
-        if after.bot or not self.tracker:
+        if after.bot or not self.tracker or not self._presence_q:
             return
-        try:
-            await self.tracker.handle_presence_update(before, after)
-        except Exception as e:
-            logger.error(f"Presence update error: {e}", exc_info=True)
+        # Most presence events are mere status flips (online/idle/dnd) with
+        # identical activities - skip them before paying for any await
+        if not before.activities and not after.activities:
+            return
+        if _activity_signature(before.activities) == _activity_signature(after.activities):
+            return
+        self._presence_q.put_nowait((before, after))
+
+    async def _drain_presence(self):
+        """Drain queued presence updates in coalesced batches.
+
+        Bursty presence traffic (many members swapping games at once) is
+        coalesced per member: only the earliest `before` and latest `after`
+        are kept, so repeated flickers collapse into one tracker call.
+        """
+        while True:
+            await asyncio.sleep(0.25)
+            if self._presence_q.empty():
+                continue
+
+            batch = {}
+            while not self._presence_q.empty():
+                before, after = self._presence_q.get_nowait()
+                if after.id in batch:
+                    batch[after.id] = (batch[after.id][0], after)
+                else:
+                    batch[after.id] = (before, after)
+
+            # Per-update error handling lives in the tracker, so one bad
+            # member can't discard the rest of the batch
+            await self.tracker.handle_presence_updates_batch(batch.values())
+
+    async def _refresh_leaderboard_loop(self):
+        """Keep the materialized leaderboard fresh.
+
+        Refreshing every LEADERBOARD_MV_MAX_AGE seconds means readers (the
+        slash commands and the web dashboard) almost always hit the cheap
+        leaderboard_mv scan instead of the full CTE aggregation.
+        """
+        while True:
+            try:
+                await self.db.refresh_leaderboard_mv()
+            except Exception as e:
+                logger.warning("Leaderboard refresh failed: %s", e)
+            await asyncio.sleep(self.db.LEADERBOARD_MV_MAX_AGE)
 
     async def on_error(self, event: str, *args, **kwargs):
         """Handle errors in events."""
-        logger.error(f"Error in {event}:", exc_info=sys.exc_info())
+        logger.error("Error in %s:", event, exc_info=sys.exc_info())
 
     async def close(self):
         """Cleanly shutdown the bot."""
@@ -81,36 +194,60 @@ class LanPartyBot(commands.Bot):
         self._shutdown = True
         
         try:
+            for task in (self._presence_task, self._mv_task):
+                if task:
+                    task.cancel()
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
             if self.tracker:
                 await self.tracker.cleanup_active_sessions()
             if self.db:
                 await self.db.close()
             await super().close()
         except Exception as e:
-            logger.error(f"Shutdown error: {e}")
+            logger.error("Shutdown error: %s", e)
         
         logger.info("Shutdown complete")
 
 
+# Built once at import; create_bot only hands out the shared instance
+_INTENTS = discord.Intents.default()
+_INTENTS.presences = True
+_INTENTS.members = True
+
+
 def create_bot(db_path: str = "stats.db", guild_id: Optional[int] = None) -> LanPartyBot:
     """Create and configure the Discord bot instance."""
-    intents = discord.Intents.default()
-    intents.presences = True
-    intents.members = True
-    return LanPartyBot(command_prefix="!", intents=intents, db_path=db_path, guild_id=guild_id)
+    # The bot is slash-only: when_mentioned avoids per-message prefix parsing
+    # and help_command=None drops the legacy help plumbing entirely
+    return LanPartyBot(
+        command_prefix=commands.when_mentioned,
+        intents=_INTENTS,
+        help_command=None,
+        db_path=db_path,
+        guild_id=guild_id,
+    )
 
 
 async def run_bot(token: str, db_path: str = "stats.db", guild_id: Optional[int] = None):
     """Run the bot and handle graceful shutdown."""
     bot = create_bot(db_path, guild_id)
     shutdown_event = asyncio.Event()
-    
-    def signal_handler(sig, frame):
+    loop = asyncio.get_running_loop()
+
+    def request_shutdown():
         logger.info("Shutdown signal received...")
         shutdown_event.set()
 
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    try:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, request_shutdown)
+    except NotImplementedError:
+        # Windows has no loop-level signal handlers; fall back to signal.signal
+        signal.signal(signal.SIGINT, lambda sig, frame: request_shutdown())
+        signal.signal(signal.SIGTERM, lambda sig, frame: request_shutdown())
 
     async def runner():
         """Run bot and wait for shutdown signal."""
@@ -119,15 +256,15 @@ async def run_bot(token: str, db_path: str = "stats.db", guild_id: Optional[int]
                 logger.info("Attempting to connect to Discord...")
                 await bot.start(token)
         except discord.errors.LoginFailure as e:
-            logger.error(f"Login failed! Invalid token or bot configuration: {e}")
+            logger.error("Login failed! Invalid token or bot configuration: %s", e)
             shutdown_event.set()
             raise
         except discord.errors.PrivilegedIntentsRequired as e:
-            logger.error(f"Missing required intents! Enable PRESENCE, MEMBERS, and MESSAGE_CONTENT intents in Developer Portal: {e}")
+            logger.error("Missing required intents! Enable PRESENCE, MEMBERS, and MESSAGE_CONTENT intents in Developer Portal: %s", e)
             shutdown_event.set()
             raise
         except Exception as e:
-            logger.error(f"Bot startup failed: {e}", exc_info=True)
+            logger.error("Bot startup failed: %s", e, exc_info=True)
             shutdown_event.set()
             raise
     
@@ -157,8 +294,14 @@ async def run_bot(token: str, db_path: str = "stats.db", guild_id: Optional[int]
     except discord.errors.PrivilegedIntentsRequired:
         logger.error("Enable required intents in Discord Developer Portal!")
     except Exception as e:
-        logger.error(f"Runtime error: {e}", exc_info=True)
+        logger.error("Runtime error: %s", e, exc_info=True)
     finally:
         if not bot.is_closed():
             await bot.close()
-        await asyncio.sleep(0.1)
\ No newline at end of file
+        # Drain whatever is actually still pending instead of a fixed sleep
+        pending = [
+            t for t in asyncio.all_tasks()
+            if t is not asyncio.current_task() and not t.done()
+        ]
+        if pending:
+            await asyncio.wait(pending, timeout=1.0)
\ No newline at end of file
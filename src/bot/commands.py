@@ -7,6 +7,9 @@ from typing import Optional
 
 from .stats import StatsManager
 
+_MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+_FOOTER = {"text": "LAN Party Stats"}
+
 
 class StatCommands(commands.Cog):
     """Cog for stat commands."""
@@ -19,15 +22,14 @@ class StatCommands(commands.Cog):
     async def stats_command(self, interaction: discord.Interaction, user: Optional[discord.Member] = None):
         """View statistics for yourself or another user."""
         target_user = user or interaction.user
+        display = target_user.display_name
 
         await interaction.response.defer()
 
         player_stats = await self.stats.get_player_stats(target_user.id)
 
         if not player_stats or player_stats['total_playtime_seconds'] == 0:
-            await interaction.followup.send(
-                f"No playtime data found for {target_user.display_name}."
-            )
+            await interaction.followup.send(f"No playtime data found for {display}.")
             return
 
         # Create embed
@@ -43,11 +45,12 @@ class StatCommands(commands.Cog):
         )
 
         if player_stats['games']:
-            top_games = "\n".join([
+            top_slice = player_stats['games'][:5]
+            top_games = "\n".join(
                 f"{idx}. {game['name']} - {game['readable']}"
-                for idx, game in enumerate(player_stats['games'][:5], 1)
-            ])
-            embed.add_field(name=f"Top {len(player_stats['games'][:5])} Games", value=top_games, inline=False)
+                for idx, game in enumerate(top_slice, 1)
+            )
+            embed.add_field(name=f"Top {len(top_slice)} Games", value=top_games, inline=False)
 
         await interaction.followup.send(embed=embed)
 
@@ -66,30 +69,18 @@ class StatCommands(commands.Cog):
             await interaction.followup.send("No leaderboard data available yet.")
             return
 
-        # Create embed
-        embed = discord.Embed(
-            title="🏆 Player Leaderboard",
-            description="Top players by total playtime",
-            color=discord.Color.gold()
-        )
-
-        for entry in leaderboard:
-            name = entry['display_name'] or entry['username']
-            value = f"**{entry['readable']}** ({entry['hours']} hrs) • {entry['games_played']} games"
-
-            # Add medal emoji for top 3
-            if entry['rank'] == 1:
-                medal = "🥇"
-            elif entry['rank'] == 2:
-                medal = "🥈"
-            elif entry['rank'] == 3:
-                medal = "🥉"
-            else:
-                medal = ""
-
-            embed.add_field(name=f"{medal} #{entry['rank']} {name}", value=value, inline=False)
-
-        embed.set_footer(text="LAN Party Stats")
+        # Build the whole embed payload once instead of N add_field calls
+        embed = discord.Embed.from_dict({
+            "title": "🏆 Player Leaderboard",
+            "description": "Top players by total playtime",
+            "color": discord.Color.gold().value,
+            "fields": [{
+                "name": f"{_MEDALS.get(entry['rank'], '')} #{entry['rank']} {entry['display_name'] or entry['username']}",
+                "value": f"**{entry['readable']}** ({entry['hours']} hrs) • {entry['games_played']} games",
+                "inline": False,
+            } for entry in leaderboard],
+            "footer": _FOOTER,
+        })
         await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="topgames", description="View the most played games")
@@ -107,22 +98,17 @@ class StatCommands(commands.Cog):
             await interaction.followup.send("No game data available yet.")
             return
 
-        # Create embed
-        embed = discord.Embed(
-            title="🎮 Top Games",
-            description="Most played games by total playtime",
-            color=discord.Color.green()
-        )
-
-        for game in top_games:
-            value = f"**{game['readable']}** ({game['hours']} hrs) • {game['unique_players']} players"
-            embed.add_field(
-                name=f"#{game['rank']} {game['name']}",
-                value=value,
-                inline=False
-            )
-
-        embed.set_footer(text="LAN Party Stats")
+        embed = discord.Embed.from_dict({
+            "title": "🎮 Top Games",
+            "description": "Most played games by total playtime",
+            "color": discord.Color.green().value,
+            "fields": [{
+                "name": f"#{game['rank']} {game['name']}",
+                "value": f"**{game['readable']}** ({game['hours']} hrs) • {game['unique_players']} players",
+                "inline": False,
+            } for game in top_games],
+            "footer": _FOOTER,
+        })
 
         await interaction.followup.send(embed=embed)
 
@@ -155,10 +141,10 @@ class StatCommands(commands.Cog):
         )
 
         if game_stats['players']:
-            top_players = "\n".join([
+            top_players = "\n".join(
                 f"{idx}. {p['display_name'] or p['username']} - {p['readable']}"
                 for idx, p in enumerate(game_stats['players'][:10], 1)
-            ])
+            )
             embed.add_field(name="Top Players", value=top_players, inline=False)
 
         embed.set_footer(text="LAN Party Stats")
@@ -179,22 +165,17 @@ class StatCommands(commands.Cog):
             await interaction.followup.send("No Spotify data available yet.")
             return
 
-        # Create embed
-        embed = discord.Embed(
-            title="🎵 Top Spotify Tracks",
-            description="Most listened tracks by total time",
-            color=discord.Color.from_rgb(30, 215, 96)  # Spotify green
-        )
-
-        for track in top_tracks:
-            value = f"**{track['artist']}** • {track['readable']} • {track['unique_listeners']} listeners"
-            embed.add_field(
-                name=f"#{track['rank']} {track['title']}",
-                value=value,
-                inline=False
-            )
-
-        embed.set_footer(text="LAN Party Stats")
+        embed = discord.Embed.from_dict({
+            "title": "🎵 Top Spotify Tracks",
+            "description": "Most listened tracks by total time",
+            "color": discord.Color.from_rgb(30, 215, 96).value,  # Spotify green
+            "fields": [{
+                "name": f"#{track['rank']} {track['title']}",
+                "value": f"**{track['artist']}** • {track['readable']} • {track['unique_listeners']} listeners",
+                "inline": False,
+            } for track in top_tracks],
+            "footer": _FOOTER,
+        })
 
         await interaction.followup.send(embed=embed)
 
@@ -202,20 +183,19 @@ class StatCommands(commands.Cog):
     async def spotify_command(self, interaction: discord.Interaction, user: Optional[discord.Member] = None):
         """View Spotify statistics for yourself or another user."""
         target_user = user or interaction.user
+        display = target_user.display_name
 
         await interaction.response.defer()
 
         spotify_stats = await self.stats.get_user_spotify_stats(target_user.id)
 
         if not spotify_stats or spotify_stats['total_seconds'] == 0:
-            await interaction.followup.send(
-                f"No Spotify data found for {target_user.display_name}."
-            )
+            await interaction.followup.send(f"No Spotify data found for {display}.")
             return
 
         # Create embed
         embed = discord.Embed(
-            title=f"{target_user.display_name} - Spotify Stats",
+            title=f"{display} - Spotify Stats",
             color=discord.Color.from_rgb(30, 215, 96)
         )
 
@@ -226,10 +206,10 @@ class StatCommands(commands.Cog):
         )
 
         if spotify_stats['top_tracks']:
-            top_tracks = "\n".join([
+            top_tracks = "\n".join(
                 f"{idx}. {t['title']} by {t['artist']} - {t['readable']}"
                 for idx, t in enumerate(spotify_stats['top_tracks'][:5], 1)
-            ])
+            )
             embed.add_field(name="Top 5 Tracks", value=top_tracks, inline=False)
 
         embed.set_footer(text="LAN Party Stats")
@@ -242,47 +222,36 @@ class StatCommands(commands.Cog):
 
         overview = await self.stats.get_overview_stats()
 
-        # Create embed
-        embed = discord.Embed(
-            title="📈 Server Statistics Overview",
-            description="Stats across all users",
-            color=discord.Color.blue()
-        )
-
-        embed.add_field(
-            name="🎮 Total Gaming Time",
-            value=f"**{overview['total_game_readable']}** ({overview['total_game_hours']} hours)",
-            inline=False
-        )
-
-        embed.add_field(
-            name="🎵 Total Spotify Time",
-            value=f"**{overview['total_spotify_readable']}** ({overview['total_spotify_hours']} hours)",
-            inline=False
-        )
-
-        embed.add_field(
-            name="Active Players",
-            value=str(overview['unique_players']),
-            inline=True
-        )
-
-        embed.add_field(
-            name="Unique Games",
-            value=str(overview['unique_games']),
-            inline=True
-        )
-
-        embed.add_field(
-            name="Unique Tracks",
-            value=str(overview['unique_tracks']),
-            inline=True
-        )
-
-        embed.set_footer(text="LAN Party Stats")
+        embed = discord.Embed.from_dict({
+            "title": "📈 Server Statistics Overview",
+            "description": "Stats across all users",
+            "color": discord.Color.blue().value,
+            "fields": [
+                {"name": "🎮 Total Gaming Time",
+                 "value": f"**{overview['total_game_readable']}** ({overview['total_game_hours']} hours)",
+                 "inline": False},
+                {"name": "🎵 Total Spotify Time",
+                 "value": f"**{overview['total_spotify_readable']}** ({overview['total_spotify_hours']} hours)",
+                 "inline": False},
+                {"name": "Active Players", "value": str(overview['unique_players']), "inline": True},
+                {"name": "Unique Games", "value": str(overview['unique_games']), "inline": True},
+                {"name": "Unique Tracks", "value": str(overview['unique_tracks']), "inline": True},
+            ],
+            "footer": _FOOTER,
+        })
         await interaction.followup.send(embed=embed)
 
 
 async def setup(bot: commands.Bot, stats_manager: StatsManager):
-    """Setup the stat commands cog."""
-    await bot.add_cog(StatCommands(bot, stats_manager))
\ No newline at end of file
+    """Setup the stat commands cog, scoped to the configured guild if set."""
+    cog = StatCommands(bot, stats_manager)
+    guild_id = getattr(bot, '_guild_id', None)
+    if guild_id:
+        # Guild-local registration keeps the commands out of the global
+        # bucket: dispatch only matches them for this guild and sync is
+        # instant instead of waiting on global propagation
+        for command in cog.walk_app_commands():
+            command.guild_only = True
+        await bot.add_cog(cog, guild=discord.Object(id=guild_id))
+    else:
+        await bot.add_cog(cog)
\ No newline at end of file
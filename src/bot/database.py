@@ -1,24 +1,261 @@
 """Database module for LAN Party Stats Bot."""
 
 import aiosqlite
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
 from typing import Optional, List, Tuple
 
+logger = logging.getLogger(__name__)
+
+# Hot-path SQL hoisted to module level: the strings are built (and hashed
+# into sqlite's statement cache) once instead of per call. Formatting stays
+# exactly as embedded so the cache keys are stable.
+_SQL_UPSERT_USER = """
+    INSERT INTO users (user_id, username, display_name, avatar_url, last_updated)
+    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(user_id) DO UPDATE SET
+        username = excluded.username,
+        display_name = excluded.display_name,
+        avatar_url = excluded.avatar_url,
+        last_updated = CURRENT_TIMESTAMP
+"""
+
+_SQL_INSERT_GAME_SESSION = "INSERT INTO game_sessions (user_id, game_id, game_name, start_time) VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))"
+
+_SQL_INSERT_SPOTIFY_SESSION = "INSERT INTO spotify_sessions (user_id, track_id, start_time) VALUES (?, ?, CURRENT_TIMESTAMP)"
+
+_SQL_END_GAME_SESSION = """
+    UPDATE game_sessions
+    SET end_time = CURRENT_TIMESTAMP,
+        duration_seconds = unixepoch(CURRENT_TIMESTAMP) - unixepoch(start_time)
+    WHERE session_id = ?
+"""
+
+_SQL_END_SPOTIFY_SESSION = """
+    UPDATE spotify_sessions
+    SET end_time = CURRENT_TIMESTAMP,
+        duration_seconds = unixepoch(CURRENT_TIMESTAMP) - unixepoch(start_time)
+    WHERE session_id = ?
+"""
+
+
+_SQL_LEADERBOARD_SELECT = """
+    WITH game_stats AS (
+        SELECT 
+            user_id,
+            SUM(COALESCE(duration_seconds, 
+                        CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))) as total_seconds,
+            COUNT(DISTINCT game_id) as games_played
+        FROM game_sessions
+        GROUP BY user_id
+    ),
+    per_game AS (
+        SELECT
+            user_id,
+            game_name,
+            SUM(COALESCE(duration_seconds,
+                        CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))) as game_seconds
+        FROM game_sessions
+        GROUP BY user_id, game_id
+    ),
+    top_game AS (
+        -- SQLite's bare-column guarantee: with a lone max() aggregate,
+        -- the ungrouped columns come from the row that supplied the max,
+        -- so one grouped pass yields each user's top game directly
+        SELECT user_id, game_name, max(game_seconds) as game_seconds
+        FROM per_game
+        GROUP BY user_id
+    ),
+    spotify_stats AS (
+        SELECT 
+            user_id,
+            COUNT(DISTINCT track_id) as tracks_count,
+            SUM(COALESCE(duration_seconds, 
+                        CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))) as total_seconds
+        FROM spotify_sessions
+        GROUP BY user_id
+    )
+    SELECT
+        u.user_id,
+        u.username,
+        u.display_name,
+        u.avatar_url,
+        COALESCE(g.total_seconds, 0) as total_game_seconds,
+        COALESCE(g.games_played, 0) as games_played,
+        COALESCE(t.game_name, 'N/A') as most_played_game,
+        COALESCE(t.game_seconds, 0) as most_played_game_seconds,
+        COALESCE(s.tracks_count, 0) as spotify_tracks_count,
+        COALESCE(s.total_seconds, 0) as spotify_total_seconds
+    FROM users u
+    LEFT JOIN game_stats g ON g.user_id = u.user_id
+    LEFT JOIN top_game t ON t.user_id = u.user_id
+    LEFT JOIN spotify_stats s ON s.user_id = u.user_id
+    ORDER BY COALESCE(g.total_seconds, 0) DESC
+"""
+
+_SQL_LEADERBOARD_JSON = """json_group_array(json_object(
+    'user_id', user_id,
+    'username', username,
+    'display_name', display_name,
+    'avatar_url', avatar_url,
+    'total_game_seconds', total_game_seconds,
+    'games_played', games_played,
+    'most_played_game', most_played_game,
+    'most_played_game_seconds', most_played_game_seconds,
+    'spotify_tracks_count', spotify_tracks_count,
+    'spotify_total_seconds', spotify_total_seconds
+))"""
+
 
 class Database:
-    """SQLite database manager with async support."""
-    
-    def __init__(self, db_path: str = "stats.db"):
+    """SQLite database manager with async support.
+
+    Writes go through a single dedicated connection; reads are served from
+    a small pool of read-only connections so stats queries don't serialize
+    behind session writes (WAL allows many concurrent readers).
+    """
+
+    # Session writes between PRAGMA optimize runs
+    OPTIMIZE_WRITE_INTERVAL = 1000
+
+    # Seconds before the materialized leaderboard counts as stale
+    LEADERBOARD_MV_MAX_AGE = 60
+
+    # Seconds between forced WAL checkpoints
+    CHECKPOINT_INTERVAL = 600
+
+    def __init__(self, db_path: str = "stats.db", read_pool_size: int = 4):
         self.db_path = db_path
         self._connection: Optional[aiosqlite.Connection] = None
-    
+        self._read_pool: Optional[asyncio.Queue] = None
+        self._read_pool_size = read_pool_size
+        self._writes_since_optimize = 0
+        # Name->id caches; game/track rows are never deleted so entries
+        # stay valid for the life of the process
+        self._game_id_cache: dict = {}
+        self._track_id_cache: dict = {}
+        self._checkpoint_task: Optional[asyncio.Task] = None
+
     async def connect(self):
         """Connect to database and initialize schema."""
-        self._connection = await aiosqlite.connect(self.db_path)
+        # cached_statements keeps compiled statements per connection keyed
+        # by SQL text - the hot-path statements (module-level _SQL_*
+        # constants and literal strings) parse once and are reused
+        self._connection = await aiosqlite.connect(self.db_path, cached_statements=256)
+        # sqlite3.Row supports both positional and named access, so existing
+        # tuple-style consumers keep working while new code can use columns
+        self._connection.row_factory = aiosqlite.Row
+        await self._apply_pragmas()
         await self._initialize_schema()
+        await self._open_read_pool()
+        if self.db_path != ":memory:":
+            self._checkpoint_task = asyncio.create_task(self._checkpoint_loop())
+
+    async def _open_read_pool(self):
+        """Open the pool of read-only connections."""
+        if self.db_path == ":memory:":
+            # A private in-memory database is invisible to other connections
+            return
+        self._read_pool = asyncio.Queue()
+        for _ in range(self._read_pool_size):
+            conn = await aiosqlite.connect(f"file:{self.db_path}?mode=ro", uri=True, cached_statements=256)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA query_only=ON")
+            await conn.execute("PRAGMA cache_size=-16000")
+            await conn.execute("PRAGMA busy_timeout=5000")
+            self._read_pool.put_nowait(conn)
+
+    @asynccontextmanager
+    async def _read(self):
+        """Check a read connection out of the pool (writer as fallback)."""
+        if self._read_pool is None:
+            yield self._connection
+            return
+        conn = await self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put_nowait(conn)
+
+    async def _apply_pragmas(self):
+        """Tune SQLite for the presence-update write path.
+
+        WAL lets readers proceed while sessions are being written and
+        synchronous=NORMAL drops one fsync per commit, which dominates the
+        cost of the small per-event transactions. The 64MB page cache and
+        mmap window keep the leaderboard aggregations off disk.
+        """
+        pragmas = [
+            "PRAGMA synchronous=NORMAL",
+            "PRAGMA temp_store=MEMORY",
+            "PRAGMA cache_size=-64000",
+            "PRAGMA busy_timeout=5000",
+        ]
+        if self.db_path != ":memory:":
+            # Journal mode and mmap only make sense for on-disk databases.
+            # 1000 pages (~4MB) is SQLite's default auto-checkpoint
+            # threshold; pin it explicitly so the WAL bound doesn't depend
+            # on build configuration or some earlier connection's setting
+            pragmas = [
+                "PRAGMA journal_mode=WAL",
+                "PRAGMA wal_autocheckpoint=1000",
+                "PRAGMA mmap_size=268435456",
+            ] + pragmas
+        for pragma in pragmas:
+            await self._connection.execute(pragma)
+        await self._connection.commit()
+
+        async with self._connection.execute("PRAGMA journal_mode") as cursor:
+            journal_mode = (await cursor.fetchone())[0]
+        logger.info("Database connected (journal_mode=%s)", journal_mode)
     
+    async def _note_write(self):
+        """Re-optimize planner statistics every OPTIMIZE_WRITE_INTERVAL writes.
+
+        The CTE-heavy leaderboard query depends on up-to-date stats to pick
+        the covering indexes; without periodic refreshes SQLite falls back
+        to heuristics as the session tables grow.
+        """
+        self._writes_since_optimize += 1
+        if self._writes_since_optimize >= self.OPTIMIZE_WRITE_INTERVAL:
+            self._writes_since_optimize = 0
+            await self._connection.execute("PRAGMA optimize")
+
+    async def _checkpoint_loop(self):
+        """Periodically truncate the WAL back to zero.
+
+        Under steady write load the passive auto-checkpoints can keep
+        falling behind active readers; an explicit TRUNCATE checkpoint
+        every CHECKPOINT_INTERVAL seconds bounds the file on disk.
+        """
+        while True:
+            await asyncio.sleep(self.CHECKPOINT_INTERVAL)
+            try:
+                async with self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cursor:
+                    busy, log_pages, moved = await cursor.fetchone()
+                if busy:
+                    logger.debug("WAL checkpoint busy (%d pages pending)", log_pages)
+            except Exception as e:
+                logger.warning("WAL checkpoint failed: %s", e)
+
     async def close(self):
-        """Close database connection."""
+        """Close database connections."""
+        if self._checkpoint_task:
+            self._checkpoint_task.cancel()
+            try:
+                await self._checkpoint_task
+            except asyncio.CancelledError:
+                pass
+            self._checkpoint_task = None
+        if self._read_pool is not None:
+            for _ in range(self._read_pool_size):
+                conn = await self._read_pool.get()
+                await conn.close()
+            self._read_pool = None
         if self._connection:
+            await self._connection.execute("PRAGMA optimize")
             await self._connection.close()
     
     async def _initialize_schema(self):
@@ -58,6 +295,7 @@ class Database:
                     session_id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_id INTEGER NOT NULL,
                     game_id INTEGER NOT NULL,
+                    game_name TEXT,
                     start_time TIMESTAMP NOT NULL,
                     end_time TIMESTAMP,
                     duration_seconds INTEGER,
@@ -65,6 +303,19 @@ class Database:
                     FOREIGN KEY (game_id) REFERENCES games(game_id)
                 )
             """)
+
+            # Migration: denormalized game_name on sessions (avoids joining
+            # games in every per-game aggregation; names never change once
+            # created, so the copy can't drift)
+            await cursor.execute("PRAGMA table_info(game_sessions)")
+            columns = {row[1] for row in await cursor.fetchall()}
+            if 'game_name' not in columns:
+                await cursor.execute("ALTER TABLE game_sessions ADD COLUMN game_name TEXT")
+            await cursor.execute("""
+                UPDATE game_sessions
+                SET game_name = (SELECT game_name FROM games WHERE games.game_id = game_sessions.game_id)
+                WHERE game_name IS NULL
+            """)
             
             await cursor.execute("""
                 CREATE TABLE IF NOT EXISTS spotify_sessions (
@@ -79,6 +330,24 @@ class Database:
                 )
             """)
             
+            # Materialized leaderboard, refreshed periodically by the bot;
+            # readers fall back to the live query when it has gone stale
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS leaderboard_mv (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT NOT NULL,
+                    display_name TEXT,
+                    avatar_url TEXT,
+                    total_game_seconds INTEGER NOT NULL,
+                    games_played INTEGER NOT NULL,
+                    most_played_game TEXT,
+                    most_played_game_seconds INTEGER NOT NULL,
+                    spotify_tracks_count INTEGER NOT NULL,
+                    spotify_total_seconds INTEGER NOT NULL,
+                    refreshed_at TIMESTAMP NOT NULL
+                )
+            """)
+
             # Indexes for performance
             for idx_query in [
                 "CREATE INDEX IF NOT EXISTS idx_game_sessions_user ON game_sessions(user_id)",
@@ -87,103 +356,287 @@ class Database:
                 "CREATE INDEX IF NOT EXISTS idx_spotify_sessions_user ON spotify_sessions(user_id)",
                 "CREATE INDEX IF NOT EXISTS idx_spotify_sessions_track ON spotify_sessions(track_id)",
                 "CREATE INDEX IF NOT EXISTS idx_spotify_sessions_time ON spotify_sessions(start_time, end_time)",
+                # Partial covering indexes: the leaderboard/top-games GROUP BY
+                # aggregations can be answered from the index alone
+                "CREATE INDEX IF NOT EXISTS idx_gs_cover_user ON game_sessions(user_id, game_id, duration_seconds) WHERE duration_seconds IS NOT NULL",
+                "CREATE INDEX IF NOT EXISTS idx_gs_cover_game ON game_sessions(game_id, user_id, duration_seconds) WHERE duration_seconds IS NOT NULL",
+                "CREATE INDEX IF NOT EXISTS idx_ss_cover_user ON spotify_sessions(user_id, track_id, duration_seconds) WHERE duration_seconds IS NOT NULL",
+                "CREATE INDEX IF NOT EXISTS idx_ss_cover_track ON spotify_sessions(track_id, user_id, duration_seconds) WHERE duration_seconds IS NOT NULL",
+                "CREATE INDEX IF NOT EXISTS idx_gs_name ON game_sessions(game_name, user_id, duration_seconds)",
+                # Active-session lookups (per-user checks, orphan scans,
+                # live playtime additions) only ever touch open rows, so a
+                # partial index stays tiny no matter how much history grows
+                "CREATE INDEX IF NOT EXISTS idx_gs_active ON game_sessions(user_id, start_time) WHERE end_time IS NULL",
+                "CREATE INDEX IF NOT EXISTS idx_ss_active ON spotify_sessions(user_id, start_time) WHERE end_time IS NULL",
             ]:
                 await cursor.execute(idx_query)
-            
+
+            # Collect stats so the planner actually picks the new indexes
+            await cursor.execute("ANALYZE")
+
             await self._connection.commit()
     
     async def upsert_user(self, user_id: int, username: str, display_name: str = None, avatar_url: str = None):
         """Insert or update user."""
         async with self._connection.cursor() as cursor:
-            await cursor.execute("""
-                INSERT INTO users (user_id, username, display_name, avatar_url, last_updated)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    username = excluded.username,
-                    display_name = excluded.display_name,
-                    avatar_url = excluded.avatar_url,
-                    last_updated = CURRENT_TIMESTAMP
-            """, (user_id, username, display_name, avatar_url))
+            await cursor.execute(_SQL_UPSERT_USER, (user_id, username, display_name, avatar_url))
             await self._connection.commit()
     
+    async def bulk_upsert_users(self, rows: List[Tuple[int, str, Optional[str], Optional[str]]]):
+        """Upsert many (user_id, username, display_name, avatar_url) rows in one transaction.
+
+        executemany runs the prepared upsert in a C loop inside sqlite3;
+        with a single commit at the end this is the SQLite equivalent of a
+        staged COPY - there is no faster bulk path short of raw VALUES
+        batching, which loses the per-row conflict handling.
+        """
+        if not rows:
+            return
+        await self._connection.executemany(_SQL_UPSERT_USER, rows)
+        await self._connection.commit()
+
     async def get_user(self, user_id: int) -> Optional[Tuple]:
         """Get user information."""
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("SELECT user_id, username, display_name, avatar_url, last_updated FROM users WHERE user_id = ?", (user_id,))
+        async with self._read() as conn:
+            cursor = await conn.execute("SELECT user_id, username, display_name, avatar_url, last_updated FROM users WHERE user_id = ?", (user_id,))
             return await cursor.fetchone()
-    
+
     async def get_or_create_game(self, game_name: str) -> int:
         """Get or create game, return game_id."""
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("INSERT OR IGNORE INTO games (game_name) VALUES (?)", (game_name,))
-            await cursor.execute("SELECT game_id FROM games WHERE game_name = ?", (game_name,))
-            result = await cursor.fetchone()
+        game_id = self._game_id_cache.get(game_name)
+        if game_id is not None:
+            return game_id
+
+        # Existing games need neither an insert nor a commit
+        cursor = await self._connection.execute("SELECT game_id FROM games WHERE game_name = ?", (game_name,))
+        row = await cursor.fetchone()
+        if row is None:
+            await self._connection.execute("INSERT OR IGNORE INTO games (game_name) VALUES (?)", (game_name,))
+            cursor = await self._connection.execute("SELECT game_id FROM games WHERE game_name = ?", (game_name,))
+            row = await cursor.fetchone()
             await self._connection.commit()
-            return result[0]
-    
+
+        self._game_id_cache[game_name] = row[0]
+        return row[0]
+
     async def get_or_create_track(self, title: str, artist: str, album: str = None) -> int:
         """Get or create Spotify track, return track_id."""
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("INSERT OR IGNORE INTO spotify_tracks (title, artist, album) VALUES (?, ?, ?)", (title, artist, album))
-            await cursor.execute("SELECT track_id FROM spotify_tracks WHERE title = ? AND artist = ?", (title, artist))
-            result = await cursor.fetchone()
+        track_id = self._track_id_cache.get((title, artist))
+        if track_id is not None:
+            return track_id
+
+        cursor = await self._connection.execute("SELECT track_id FROM spotify_tracks WHERE title = ? AND artist = ?", (title, artist))
+        row = await cursor.fetchone()
+        if row is None:
+            await self._connection.execute("INSERT OR IGNORE INTO spotify_tracks (title, artist, album) VALUES (?, ?, ?)", (title, artist, album))
+            cursor = await self._connection.execute("SELECT track_id FROM spotify_tracks WHERE title = ? AND artist = ?", (title, artist))
+            row = await cursor.fetchone()
             await self._connection.commit()
-            return result[0]
+
+        self._track_id_cache[(title, artist)] = row[0]
+        return row[0]
     
-    async def start_game_session(self, user_id: int, game_name: str) -> int:
-        """Start new game session."""
-        game_id = await self.get_or_create_game(game_name)
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("INSERT INTO game_sessions (user_id, game_id, start_time) VALUES (?, ?, CURRENT_TIMESTAMP)", (user_id, game_id))
-            await self._connection.commit()
-            return cursor.lastrowid
+    async def bulk_get_or_create_tracks(self, tracks: List[Tuple[str, str, Optional[str]]]) -> dict:
+        """Resolve many (title, artist, album) triples to ids with at most one write transaction.
+
+        Returns {(title, artist): track_id}; the album of the first
+        occurrence wins, matching get_or_create_track.
+        """
+        key_to_id = {}
+        missing = {}
+        for title, artist, album in tracks:
+            key = (title, artist)
+            if key in key_to_id or key in missing:
+                continue
+            track_id = self._track_id_cache.get(key)
+            if track_id is not None:
+                key_to_id[key] = track_id
+            else:
+                missing[key] = album
+        if missing:
+            conn = self._connection
+            await conn.executemany(
+                "INSERT OR IGNORE INTO spotify_tracks (title, artist, album) VALUES (?, ?, ?)",
+                [(title, artist, album) for (title, artist), album in missing.items()]
+            )
+            where = " OR ".join("(title = ? AND artist = ?)" for _ in missing)
+            params = [value for key in missing for value in key]
+            cursor = await conn.execute(
+                f"SELECT track_id, title, artist FROM spotify_tracks WHERE {where}",
+                params
+            )
+            for track_id, title, artist in await cursor.fetchall():
+                key_to_id[(title, artist)] = track_id
+                self._track_id_cache[(title, artist)] = track_id
+            await conn.commit()
+        return key_to_id
+
+    async def start_game_session(self, user_id: int, game_name: str, start_time: Optional[str] = None) -> int:
+        """Start new game session.
+
+        Game resolution and the session insert share one transaction, so a
+        session start costs a single commit (one fsync) whether or not the
+        game row already exists. start_time ('YYYY-MM-DD HH:MM:SS', UTC)
+        lets debounced starts backdate to when the activity actually began.
+        """
+        conn = self._connection
+        game_id = self._game_id_cache.get(game_name)
+        if game_id is None:
+            cursor = await conn.execute("SELECT game_id FROM games WHERE game_name = ?", (game_name,))
+            row = await cursor.fetchone()
+            if row is None:
+                await conn.execute("INSERT OR IGNORE INTO games (game_name) VALUES (?)", (game_name,))
+                cursor = await conn.execute("SELECT game_id FROM games WHERE game_name = ?", (game_name,))
+                row = await cursor.fetchone()
+            game_id = row[0]
+            self._game_id_cache[game_name] = game_id
+        cursor = await conn.execute(_SQL_INSERT_GAME_SESSION, (user_id, game_id, game_name, start_time))
+        await conn.commit()
+        await self._note_write()
+        return cursor.lastrowid
     
+    async def bulk_start_game_sessions(self, items: List[Tuple[int, str]]) -> List[int]:
+        """Start game sessions for many (user_id, game_name) pairs at once.
+
+        Game rows are created with one executemany and all session inserts
+        share a single BEGIN IMMEDIATE transaction, so a burst of N session
+        starts costs one commit instead of 2N. Returns the new session ids
+        in input order.
+        """
+        if not items:
+            return []
+
+        conn = self._connection
+        names = list({game_name for _, game_name in items})
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            await conn.executemany(
+                "INSERT OR IGNORE INTO games (game_name) VALUES (?)",
+                [(name,) for name in names]
+            )
+            placeholders = ",".join("?" * len(names))
+            cursor = await conn.execute(
+                f"SELECT game_id, game_name FROM games WHERE game_name IN ({placeholders})",
+                names
+            )
+            name_to_id = {name: game_id for game_id, name in await cursor.fetchall()}
+            self._game_id_cache.update(name_to_id)
+
+            session_ids = []
+            for user_id, game_name in items:
+                cursor = await conn.execute(_SQL_INSERT_GAME_SESSION, (user_id, name_to_id[game_name], game_name, None))
+                session_ids.append(cursor.lastrowid)
+
+            await conn.commit()
+            await self._note_write()
+            return session_ids
+        except Exception:
+            await conn.rollback()
+            raise
+
     async def end_game_session(self, session_id: int):
         """End game session and calculate duration."""
         async with self._connection.cursor() as cursor:
-            await cursor.execute("""
-                UPDATE game_sessions
-                SET end_time = CURRENT_TIMESTAMP,
-                    duration_seconds = CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER)
-                WHERE session_id = ?
-            """, (session_id,))
+            await cursor.execute(_SQL_END_GAME_SESSION, (session_id,))
             await self._connection.commit()
+            await self._note_write()
+
+    async def bulk_end_game_sessions(self, session_ids: List[int]):
+        """End many game sessions with a single UPDATE and commit."""
+        if not session_ids:
+            return
+        placeholders = ",".join("?" * len(session_ids))
+        await self._connection.execute(f"""
+            UPDATE game_sessions
+            SET end_time = CURRENT_TIMESTAMP,
+                duration_seconds = unixepoch(CURRENT_TIMESTAMP) - unixepoch(start_time)
+            WHERE session_id IN ({placeholders}) AND end_time IS NULL
+        """, session_ids)
+        await self._connection.commit()
+        await self._note_write()
     
     async def get_active_game_session(self, user_id: int) -> Optional[Tuple]:
         """Get active game session for user."""
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("""
-                SELECT gs.session_id, g.game_name, gs.start_time
+        async with self._read() as conn:
+            cursor = await conn.execute("""
+                SELECT gs.session_id, gs.game_name, gs.start_time
                 FROM game_sessions gs
-                JOIN games g ON gs.game_id = g.game_id
                 WHERE gs.user_id = ? AND gs.end_time IS NULL
                 ORDER BY gs.start_time DESC LIMIT 1
             """, (user_id,))
             return await cursor.fetchone()
     
     async def start_spotify_session(self, user_id: int, title: str, artist: str, album: str = None) -> int:
-        """Start new Spotify session."""
-        track_id = await self.get_or_create_track(title, artist, album)
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("INSERT INTO spotify_sessions (user_id, track_id, start_time) VALUES (?, ?, CURRENT_TIMESTAMP)", (user_id, track_id))
-            await self._connection.commit()
-            return cursor.lastrowid
+        """Start new Spotify session.
+
+        Track resolution and the session insert share one transaction, the
+        same way start_game_session batches its commit.
+        """
+        conn = self._connection
+        track_id = self._track_id_cache.get((title, artist))
+        if track_id is None:
+            cursor = await conn.execute("SELECT track_id FROM spotify_tracks WHERE title = ? AND artist = ?", (title, artist))
+            row = await cursor.fetchone()
+            if row is None:
+                await conn.execute("INSERT OR IGNORE INTO spotify_tracks (title, artist, album) VALUES (?, ?, ?)", (title, artist, album))
+                cursor = await conn.execute("SELECT track_id FROM spotify_tracks WHERE title = ? AND artist = ?", (title, artist))
+                row = await cursor.fetchone()
+            track_id = row[0]
+            self._track_id_cache[(title, artist)] = track_id
+        cursor = await conn.execute(_SQL_INSERT_SPOTIFY_SESSION, (user_id, track_id))
+        await conn.commit()
+        await self._note_write()
+        return cursor.lastrowid
     
     async def end_spotify_session(self, session_id: int):
         """End Spotify session and calculate duration."""
         async with self._connection.cursor() as cursor:
-            await cursor.execute("""
-                UPDATE spotify_sessions
-                SET end_time = CURRENT_TIMESTAMP,
-                    duration_seconds = CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER)
-                WHERE session_id = ?
-            """, (session_id,))
+            await cursor.execute(_SQL_END_SPOTIFY_SESSION, (session_id,))
             await self._connection.commit()
-    
+            await self._note_write()
+
+    async def bulk_end_spotify_sessions(self, session_ids: List[int]):
+        """End many Spotify sessions with a single UPDATE and commit."""
+        if not session_ids:
+            return
+        placeholders = ",".join("?" * len(session_ids))
+        await self._connection.execute(f"""
+            UPDATE spotify_sessions
+            SET end_time = CURRENT_TIMESTAMP,
+                duration_seconds = unixepoch(CURRENT_TIMESTAMP) - unixepoch(start_time)
+            WHERE session_id IN ({placeholders}) AND end_time IS NULL
+        """, session_ids)
+        await self._connection.commit()
+        await self._note_write()
+
+    async def bulk_close_orphaned_with_cap(self, table: str, session_ids: List[int], max_hours: float = 12):
+        """Close orphaned sessions in one UPDATE, capping their duration.
+
+        Orphans left by a crash may be arbitrarily old; crediting the full
+        gap would record days of "playtime" for a session that really ended
+        when the bot went down. Cap end_time at start_time + max_hours.
+        """
+        if not session_ids:
+            return
+        if table not in ("game_sessions", "spotify_sessions"):
+            raise ValueError(f"Unknown session table: {table}")
+        placeholders = ",".join("?" * len(session_ids))
+        cap_seconds = int(max_hours * 3600)
+        await self._connection.execute(f"""
+            UPDATE {table}
+            SET end_time = datetime(min(unixepoch(start_time) + {cap_seconds},
+                                        unixepoch(CURRENT_TIMESTAMP)), 'unixepoch'),
+                duration_seconds = min({cap_seconds},
+                                       unixepoch(CURRENT_TIMESTAMP) - unixepoch(start_time))
+            WHERE session_id IN ({placeholders}) AND end_time IS NULL
+        """, session_ids)
+        await self._connection.commit()
+        await self._note_write()
+
     async def get_active_spotify_session(self, user_id: int) -> Optional[Tuple]:
         """Get active Spotify session for user."""
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("""
+        async with self._read() as conn:
+            cursor = await conn.execute("""
                 SELECT ss.session_id, st.title, st.artist, st.album, ss.start_time
                 FROM spotify_sessions ss
                 JOIN spotify_tracks st ON ss.track_id = st.track_id
@@ -194,27 +647,32 @@ class Database:
     
     async def get_all_orphaned_sessions(self) -> Tuple[List[Tuple], List[Tuple]]:
         """Get ALL orphaned sessions (no end_time) regardless of age.
-        
+
         Returns:
-            Tuple of (game_sessions, spotify_sessions)
-            Each as list of (session_id, user_id, game_id/track_id)
+            Tuple of (game_sessions, spotify_sessions) as lists of
+            (session_id, user_id, game_name) and
+            (session_id, user_id, title, artist). Names are resolved here
+            so callers can match orphans against Discord activities
+            without any per-member id lookups.
         """
-        async with self._connection.cursor() as cursor:
-            # Get ALL orphaned game sessions
+        async with self._read() as conn, conn.cursor() as cursor:
+            # Get ALL orphaned game sessions (game_name is denormalized
+            # onto the session row)
             await cursor.execute("""
-                SELECT session_id, user_id, game_id
+                SELECT session_id, user_id, game_name
                 FROM game_sessions
                 WHERE end_time IS NULL
                 ORDER BY start_time DESC
             """)
             orphaned_games = await cursor.fetchall()
-            
+
             # Get ALL orphaned spotify sessions
             await cursor.execute("""
-                SELECT session_id, user_id, track_id
-                FROM spotify_sessions
-                WHERE end_time IS NULL
-                ORDER BY start_time DESC
+                SELECT ss.session_id, ss.user_id, st.title, st.artist
+                FROM spotify_sessions ss
+                JOIN spotify_tracks st ON ss.track_id = st.track_id
+                WHERE ss.end_time IS NULL
+                ORDER BY ss.start_time DESC
             """)
             orphaned_spotify = await cursor.fetchall()
             
@@ -222,107 +680,139 @@ class Database:
     
     async def get_user_total_playtime(self, user_id: int) -> int:
         """Get total playtime in seconds for user, including active sessions."""
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("""
+        async with self._read() as conn:
+            cursor = await conn.execute("""
                 SELECT COALESCE(SUM(duration_seconds), 0) FROM game_sessions WHERE user_id = ? AND duration_seconds IS NOT NULL
             """, (user_id,))
             finished_seconds = (await cursor.fetchone())[0]
-            
+
             # Add current active session duration
-            await cursor.execute("""
+            cursor = await conn.execute("""
                 SELECT CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER)
                 FROM game_sessions
                 WHERE user_id = ? AND end_time IS NULL
             """, (user_id,))
             active_row = await cursor.fetchone()
             active_seconds = active_row[0] if active_row else 0
-            
+
             return finished_seconds + active_seconds
-    
+
     async def get_user_game_playtime(self, user_id: int, game_name: str) -> int:
         """Get playtime in seconds for specific user and game."""
-        async with self._connection.cursor() as cursor:
-            await cursor.execute("""
-                SELECT COALESCE(SUM(gs.duration_seconds), 0)
-                FROM game_sessions gs JOIN games g ON gs.game_id = g.game_id
-                WHERE gs.user_id = ? AND g.game_name = ? AND gs.duration_seconds IS NOT NULL
+        async with self._read() as conn:
+            cursor = await conn.execute("""
+                SELECT COALESCE(SUM(duration_seconds), 0)
+                FROM game_sessions
+                WHERE user_id = ? AND game_name = ? AND duration_seconds IS NOT NULL
             """, (user_id, game_name))
             return (await cursor.fetchone())[0]
     
+    async def get_user_games(self, user_id: int, limit: int = 10) -> List[Tuple]:
+        """Get top per-game playtime for user, including active sessions.
+
+        Only `limit` rows are returned; each carries a games_played column
+        (COUNT(*) OVER ()) with the user's full distinct-game count so
+        callers don't need a second query for it.
+        """
+        async with self._read() as conn:
+            cursor = await conn.execute("""
+                SELECT game_name, SUM(COALESCE(duration_seconds,
+                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))) as total_seconds,
+                       COUNT(*) OVER () as games_played
+                FROM game_sessions
+                WHERE user_id = ?
+                GROUP BY game_id ORDER BY total_seconds DESC
+                LIMIT ?
+            """, (user_id, limit))
+            return await cursor.fetchall()
+
+    async def get_user_spotify_seconds(self, user_id: int) -> int:
+        """Get total Spotify listening seconds for user, including active sessions."""
+        async with self._read() as conn:
+            cursor = await conn.execute("""
+                SELECT COALESCE(SUM(COALESCE(duration_seconds,
+                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))), 0)
+                FROM spotify_sessions WHERE user_id = ?
+            """, (user_id,))
+            return (await cursor.fetchone())[0]
+
+    async def get_user_spotify_tracks(self, user_id: int) -> List[Tuple]:
+        """Get per-track listening time for user, including active sessions."""
+        async with self._read() as conn:
+            cursor = await conn.execute("""
+                SELECT st.title, st.artist, st.album, SUM(COALESCE(ss.duration_seconds,
+                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(ss.start_time)) * 86400 AS INTEGER))) as total_seconds
+                FROM spotify_sessions ss JOIN spotify_tracks st ON ss.track_id = st.track_id
+                WHERE ss.user_id = ?
+                GROUP BY ss.track_id ORDER BY total_seconds DESC
+            """, (user_id,))
+            return await cursor.fetchall()
+
     async def get_top_games(self, limit: int = 10) -> List[Tuple]:
         """Get top games by total playtime, including active sessions."""
-        async with self._connection.cursor() as cursor:
+        async with self._read() as conn, conn.cursor() as cursor:
             await cursor.execute("""
-                SELECT g.game_name, 
-                       COALESCE(SUM(COALESCE(gs.duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(gs.start_time)) * 86400 AS INTEGER))), 0) as total_seconds,
-                       COUNT(DISTINCT gs.user_id) as unique_players
-                FROM games g 
-                LEFT JOIN game_sessions gs ON gs.game_id = g.game_id
-                GROUP BY g.game_id 
+                SELECT game_name, 
+                       SUM(COALESCE(duration_seconds, 
+                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))) as total_seconds,
+                       COUNT(DISTINCT user_id) as unique_players
+                FROM game_sessions
+                GROUP BY game_id 
                 ORDER BY total_seconds DESC 
                 LIMIT ?
             """, (limit,))
             return await cursor.fetchall()
     
-    async def get_player_leaderboard(self, limit: int = 10) -> List[Tuple]:
-        """Get player leaderboard by total playtime with enhanced stats, including active sessions."""
-        async with self._connection.cursor() as cursor:
-            # Simplified query using CTEs for better readability and performance
+    async def refresh_leaderboard_mv(self):
+        """Rebuild the materialized leaderboard in one transaction."""
+        conn = self._connection
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            await conn.execute("DELETE FROM leaderboard_mv")
+            await conn.execute(f"""
+                INSERT INTO leaderboard_mv
+                SELECT *, CURRENT_TIMESTAMP FROM ({_SQL_LEADERBOARD_SELECT})
+            """)
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+
+    async def get_player_leaderboard(self, limit: int = 10) -> List[dict]:
+        """Get player leaderboard by total playtime with enhanced stats, including active sessions.
+
+        Served from leaderboard_mv while it is fresh (the bot refreshes it
+        every LEADERBOARD_MV_MAX_AGE seconds); otherwise the live CTE query
+        runs. Either way the rows are aggregated to one JSON document inside
+        SQLite and parsed once here, so N rows cross the aiosqlite worker
+        thread as a single value instead of N Row objects.
+        """
+        async with self._read() as conn, conn.cursor() as cursor:
             await cursor.execute("""
-                WITH game_stats AS (
-                    SELECT 
-                        user_id,
-                        SUM(COALESCE(duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))) as total_seconds,
-                        COUNT(DISTINCT game_id) as games_played
-                    FROM game_sessions
-                    GROUP BY user_id
-                ),
-                top_game AS (
-                    SELECT 
-                        gs.user_id,
-                        g.game_name,
-                        SUM(COALESCE(gs.duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(gs.start_time)) * 86400 AS INTEGER))) as game_seconds,
-                        ROW_NUMBER() OVER (PARTITION BY gs.user_id ORDER BY SUM(COALESCE(gs.duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(gs.start_time)) * 86400 AS INTEGER))) DESC) as rn
-                    FROM game_sessions gs
-                    JOIN games g ON gs.game_id = g.game_id
-                    GROUP BY gs.user_id, g.game_id
-                ),
-                spotify_stats AS (
-                    SELECT 
-                        user_id,
-                        COUNT(DISTINCT track_id) as tracks_count,
-                        SUM(COALESCE(duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))) as total_seconds
-                    FROM spotify_sessions
-                    GROUP BY user_id
-                )
-                SELECT 
-                    u.user_id,
-                    u.username,
-                    u.display_name,
-                    u.avatar_url,
-                    COALESCE(g.total_seconds, 0) as total_game_seconds,
-                    COALESCE(g.games_played, 0) as games_played,
-                    COALESCE(t.game_name, 'N/A') as most_played_game,
-                    COALESCE(t.game_seconds, 0) as most_played_game_seconds,
-                    COALESCE(s.tracks_count, 0) as spotify_tracks_count,
-                    COALESCE(s.total_seconds, 0) as spotify_total_seconds
-                FROM users u
-                LEFT JOIN game_stats g ON g.user_id = u.user_id
-                LEFT JOIN top_game t ON t.user_id = u.user_id AND t.rn = 1
-                LEFT JOIN spotify_stats s ON s.user_id = u.user_id
-                ORDER BY COALESCE(g.total_seconds, 0) DESC
-                LIMIT ?
-            """, (limit,))
-            return await cursor.fetchall()
-    
+                SELECT COUNT(*), unixepoch(CURRENT_TIMESTAMP) - unixepoch(MAX(refreshed_at))
+                FROM leaderboard_mv
+            """)
+            mv_rows, mv_age = await cursor.fetchone()
+            if mv_rows and mv_age is not None and mv_age <= self.LEADERBOARD_MV_MAX_AGE:
+                await cursor.execute(f"""
+                    SELECT {_SQL_LEADERBOARD_JSON}
+                    FROM (
+                        SELECT * FROM leaderboard_mv
+                        ORDER BY total_game_seconds DESC
+                        LIMIT ?
+                    )
+                """, (limit,))
+            else:
+                await cursor.execute(f"""
+                    SELECT {_SQL_LEADERBOARD_JSON}
+                    FROM ({_SQL_LEADERBOARD_SELECT} LIMIT ?)
+                """, (limit,))
+            row = await cursor.fetchone()
+            return json.loads(row[0]) if row and row[0] else []
+
     async def get_top_spotify_tracks(self, limit: int = 10) -> List[Tuple]:
         """Get top Spotify tracks by listening time, including active sessions."""
-        async with self._connection.cursor() as cursor:
+        async with self._read() as conn, conn.cursor() as cursor:
             await cursor.execute("""
                 SELECT st.title, st.artist, st.album, 
                        SUM(COALESCE(ss.duration_seconds, 
@@ -333,32 +823,41 @@ class Database:
             """, (limit,))
             return await cursor.fetchall()
     
+    async def get_game_total_seconds(self, game_name: str) -> int:
+        """Get total playtime in seconds for a game, including active sessions."""
+        async with self._read() as conn:
+            cursor = await conn.execute("""
+                SELECT COALESCE(SUM(COALESCE(duration_seconds,
+                            CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))), 0)
+                FROM game_sessions
+                WHERE game_name = ?
+            """, (game_name,))
+            return (await cursor.fetchone())[0]
+
     async def get_game_players(self, game_name: str) -> List[Tuple]:
         """Get all players and playtime for specific game, including active sessions."""
-        async with self._connection.cursor() as cursor:
+        async with self._read() as conn, conn.cursor() as cursor:
             await cursor.execute("""
                 SELECT u.username, u.display_name, u.user_id,
                        SUM(COALESCE(gs.duration_seconds, 
                                     CAST((julianday(CURRENT_TIMESTAMP) - julianday(gs.start_time)) * 86400 AS INTEGER))) as total_seconds
                 FROM game_sessions gs
                 JOIN users u ON gs.user_id = u.user_id
-                JOIN games g ON gs.game_id = g.game_id
-                WHERE g.game_name = ?
+                WHERE gs.game_name = ?
                 GROUP BY gs.user_id ORDER BY total_seconds DESC
             """, (game_name,))
             return await cursor.fetchall()
     
     async def get_game_timeline(self, game_name: str) -> List[Tuple]:
         """Get game session timeline showing player count over time (hourly)."""
-        async with self._connection.cursor() as cursor:
+        async with self._read() as conn, conn.cursor() as cursor:
             await cursor.execute("""
                 SELECT strftime('%Y-%m-%d %H:00:00', gs.start_time) as session_hour,
                        COUNT(DISTINCT gs.user_id) as player_count,
                        SUM(COALESCE(gs.duration_seconds, 
                                     CAST((julianday(CURRENT_TIMESTAMP) - julianday(gs.start_time)) * 86400 AS INTEGER))) as total_seconds
                 FROM game_sessions gs
-                JOIN games g ON gs.game_id = g.game_id
-                WHERE g.game_name = ?
+                WHERE gs.game_name = ?
                 GROUP BY strftime('%Y-%m-%d %H:00:00', gs.start_time)
                 ORDER BY session_hour ASC
             """, (game_name,))
@@ -1,5 +1,7 @@
 """Statistics and formatting utilities."""
 
+import asyncio
+from functools import lru_cache
 from typing import List, Dict, Optional
 
 from .database import Database
@@ -9,8 +11,8 @@ def seconds_to_readable(seconds: int) -> str:
     """Convert seconds to readable format (12h 34m)."""
     if seconds < 60:
         return f"{seconds}s"
-    hours = seconds // 3600
-    minutes = (seconds % 3600) // 60
+    hours, rem = divmod(seconds, 3600)
+    minutes = rem // 60
     return f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
 
 
@@ -19,6 +21,12 @@ def seconds_to_hours(seconds: int) -> float:
     return round(seconds / 3600, 2)
 
 
+@lru_cache(maxsize=4096)
+def _fmt(seconds: int) -> tuple:
+    """Cached (readable, hours) pair — durations repeat heavily across rows."""
+    return seconds_to_readable(seconds), seconds_to_hours(seconds)
+
+
 class StatsManager:
     """Statistics queries and formatting."""
     
@@ -27,32 +35,26 @@ class StatsManager:
     
     async def get_player_stats(self, user_id: int) -> Optional[Dict]:
         """Get comprehensive stats for a player, including active sessions."""
-        user = await self.db.get_user(user_id)
+        # Independent reads served concurrently from the read pool
+        user, total_seconds, games = await asyncio.gather(
+            self.db.get_user(user_id),
+            self.db.get_user_total_playtime(user_id),
+            self.db.get_user_games(user_id),
+        )
         if not user:
             return None
-        
-        total_seconds = await self.db.get_user_total_playtime(user_id)
-        
-        async with self.db._connection.cursor() as cursor:
-            await cursor.execute("""
-                SELECT g.game_name, SUM(COALESCE(gs.duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(gs.start_time)) * 86400 AS INTEGER))) as total_seconds
-                FROM game_sessions gs JOIN games g ON gs.game_id = g.game_id
-                WHERE gs.user_id = ?
-                GROUP BY g.game_id ORDER BY total_seconds DESC
-            """, (user_id,))
-            games = await cursor.fetchall()
-        
+
+        readable, hours = _fmt(total_seconds)
         return {
             'user_id': user[0],
             'username': user[1],
             'display_name': user[2],
             'avatar_url': user[3],
             'total_playtime_seconds': total_seconds,
-            'total_playtime_readable': seconds_to_readable(total_seconds),
-            'total_playtime_hours': seconds_to_hours(total_seconds),
-            'games_played': len(games),
-            'games': [{'name': g[0], 'seconds': g[1], 'readable': seconds_to_readable(g[1]), 'hours': seconds_to_hours(g[1])} for g in games]
+            'total_playtime_readable': readable,
+            'total_playtime_hours': hours,
+            'games_played': games[0]['games_played'] if games else 0,
+            'games': [{'name': g[0], 'seconds': g[1], 'readable': _fmt(g[1])[0], 'hours': _fmt(g[1])[1]} for g in games]
         }
     
     async def get_leaderboard(self, limit: int = 10) -> List[Dict]:
@@ -60,22 +62,22 @@ class StatsManager:
         players = await self.db.get_player_leaderboard(limit)
         return [{
             'rank': idx,
-            'user_id': p[0],
-            'username': p[1],
-            'display_name': p[2],
-            'avatar_url': p[3],
-            'total_seconds': p[4],
-            'readable': seconds_to_readable(p[4]),
-            'hours': seconds_to_hours(p[4]),
-            'games_played': p[5],
-            'most_played_game': 'Nüxxx' if p[5] == 0 else p[6],
-            'most_played_game_seconds': p[7],
-            'most_played_game_readable': seconds_to_readable(p[7]),
-            'most_played_game_hours': seconds_to_hours(p[7]),
-            'spotify_tracks_count': p[8],
-            'spotify_total_seconds': p[9],
-            'spotify_readable': seconds_to_readable(p[9]),
-            'spotify_hours': seconds_to_hours(p[9])
+            'user_id': p['user_id'],
+            'username': p['username'],
+            'display_name': p['display_name'],
+            'avatar_url': p['avatar_url'],
+            'total_seconds': p['total_game_seconds'],
+            'readable': _fmt(p['total_game_seconds'])[0],
+            'hours': _fmt(p['total_game_seconds'])[1],
+            'games_played': p['games_played'],
+            'most_played_game': 'Nüxxx' if p['games_played'] == 0 else p['most_played_game'],
+            'most_played_game_seconds': p['most_played_game_seconds'],
+            'most_played_game_readable': _fmt(p['most_played_game_seconds'])[0],
+            'most_played_game_hours': _fmt(p['most_played_game_seconds'])[1],
+            'spotify_tracks_count': p['spotify_tracks_count'],
+            'spotify_total_seconds': p['spotify_total_seconds'],
+            'spotify_readable': _fmt(p['spotify_total_seconds'])[0],
+            'spotify_hours': _fmt(p['spotify_total_seconds'])[1]
         } for idx, p in enumerate(players, 1)]
     
     async def get_top_games(self, limit: int = 10) -> List[Dict]:
@@ -85,33 +87,36 @@ class StatsManager:
             'rank': idx,
             'name': g[0],
             'total_seconds': g[1],
-            'readable': seconds_to_readable(g[1]),
-            'hours': seconds_to_hours(g[1]),
+            'readable': _fmt(g[1])[0],
+            'hours': _fmt(g[1])[1],
             'unique_players': g[2]
         } for idx, g in enumerate(games, 1)]
     
     async def get_game_details(self, game_name: str) -> Optional[Dict]:
         """Get detailed statistics for a specific game."""
-        players = await self.db.get_game_players(game_name)
+        # Independent reads; the total is summed in SQL instead of Python
+        players, total_seconds, timeline = await asyncio.gather(
+            self.db.get_game_players(game_name),
+            self.db.get_game_total_seconds(game_name),
+            self.db.get_game_timeline(game_name),
+        )
         if not players:
             return None
-        
-        total_seconds = sum(p[3] for p in players)
-        timeline = await self.db.get_game_timeline(game_name)
-        
+
+        readable, hours = _fmt(total_seconds)
         return {
             'game_name': game_name,
             'total_seconds': total_seconds,
-            'readable': seconds_to_readable(total_seconds),
-            'hours': seconds_to_hours(total_seconds),
+            'readable': readable,
+            'hours': hours,
             'unique_players': len(players),
             'players': [{
                 'username': p[0], 
                 'display_name': p[1], 
                 'user_id': p[2],
-                'seconds': p[3], 
-                'readable': seconds_to_readable(p[3]), 
-                'hours': seconds_to_hours(p[3])
+                'seconds': p[3],
+                'readable': _fmt(p[3])[0],
+                'hours': _fmt(p[3])[1]
             } for p in players],
             'timeline': [{
                 'date': t[0],
@@ -130,71 +135,55 @@ class StatsManager:
             'artist': t[1],
             'album': t[2],
             'total_seconds': t[3],
-            'readable': seconds_to_readable(t[3]),
-            'hours': seconds_to_hours(t[3]),
+            'readable': _fmt(t[3])[0],
+            'hours': _fmt(t[3])[1],
             'unique_listeners': t[4]
         } for idx, t in enumerate(tracks, 1)]
     
     async def get_user_spotify_stats(self, user_id: int) -> Dict:
         """Get Spotify stats for a user, including active sessions."""
-        async with self.db._connection.cursor() as cursor:
-            await cursor.execute("""
-                SELECT COALESCE(SUM(COALESCE(duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))), 0) 
-                FROM spotify_sessions WHERE user_id = ?
-            """, (user_id,))
-            total_seconds = (await cursor.fetchone())[0]
-            
-            await cursor.execute("""
-                SELECT st.title, st.artist, st.album, SUM(COALESCE(ss.duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(ss.start_time)) * 86400 AS INTEGER))) as total_seconds
-                FROM spotify_sessions ss JOIN spotify_tracks st ON ss.track_id = st.track_id
-                WHERE ss.user_id = ?
-                GROUP BY ss.track_id ORDER BY total_seconds DESC
-            """, (user_id,))
-            tracks = await cursor.fetchall()
-        
+        total_seconds, tracks = await asyncio.gather(
+            self.db.get_user_spotify_seconds(user_id),
+            self.db.get_user_spotify_tracks(user_id),
+        )
+
+        readable, hours = _fmt(total_seconds)
         return {
             'total_seconds': total_seconds,
-            'readable': seconds_to_readable(total_seconds),
-            'hours': seconds_to_hours(total_seconds),
+            'readable': readable,
+            'hours': hours,
             'tracks_count': len(tracks),
-            'top_tracks': [{'title': t[0], 'artist': t[1], 'album': t[2], 'seconds': t[3], 'readable': seconds_to_readable(t[3]), 'hours': seconds_to_hours(t[3])} for t in tracks]
+            'top_tracks': [{'title': t[0], 'artist': t[1], 'album': t[2], 'seconds': t[3], 'readable': _fmt(t[3])[0], 'hours': _fmt(t[3])[1]} for t in tracks]
         }
     
     async def get_overview_stats(self) -> Dict:
         """Get overview statistics for entire server, including active sessions."""
-        async with self.db._connection.cursor() as cursor:
-            await cursor.execute("""
-                SELECT COALESCE(SUM(COALESCE(duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))), 0) 
-                FROM game_sessions
-            """)
-            total_game_seconds = (await cursor.fetchone())[0]
-            
-            await cursor.execute("""
-                SELECT COALESCE(SUM(COALESCE(duration_seconds, 
-                                    CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))), 0) 
-                FROM spotify_sessions
+        # Scalar subqueries collapse the five round-trips into a single row
+        async with self.db._read() as conn:
+            cursor = await conn.execute("""
+                SELECT
+                    (SELECT COALESCE(SUM(COALESCE(duration_seconds,
+                            CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))), 0)
+                     FROM game_sessions),
+                    (SELECT COALESCE(SUM(COALESCE(duration_seconds,
+                            CAST((julianday(CURRENT_TIMESTAMP) - julianday(start_time)) * 86400 AS INTEGER))), 0)
+                     FROM spotify_sessions),
+                    (SELECT COUNT(DISTINCT user_id) FROM game_sessions),
+                    (SELECT COUNT(*) FROM games),
+                    (SELECT COUNT(*) FROM spotify_tracks)
             """)
-            total_spotify_seconds = (await cursor.fetchone())[0]
-            
-            await cursor.execute("SELECT COUNT(DISTINCT user_id) FROM game_sessions")
-            unique_players = (await cursor.fetchone())[0]
-            
-            await cursor.execute("SELECT COUNT(*) FROM games")
-            unique_games = (await cursor.fetchone())[0]
-            
-            await cursor.execute("SELECT COUNT(*) FROM spotify_tracks")
-            unique_tracks = (await cursor.fetchone())[0]
-        
+            (total_game_seconds, total_spotify_seconds,
+             unique_players, unique_games, unique_tracks) = await cursor.fetchone()
+
+        game_readable, game_hours = _fmt(total_game_seconds)
+        spotify_readable, spotify_hours = _fmt(total_spotify_seconds)
         return {
             'total_game_seconds': total_game_seconds,
-            'total_game_readable': seconds_to_readable(total_game_seconds),
-            'total_game_hours': seconds_to_hours(total_game_seconds),
+            'total_game_readable': game_readable,
+            'total_game_hours': game_hours,
             'total_spotify_seconds': total_spotify_seconds,
-            'total_spotify_readable': seconds_to_readable(total_spotify_seconds),
-            'total_spotify_hours': seconds_to_hours(total_spotify_seconds),
+            'total_spotify_readable': spotify_readable,
+            'total_spotify_hours': spotify_hours,
             'unique_players': unique_players,
             'unique_games': unique_games,
             'unique_tracks': unique_tracks
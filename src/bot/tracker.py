@@ -1,6 +1,9 @@
 """Activity tracker for games and Spotify."""
 
+import asyncio
 import discord
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Dict, Optional, Tuple
 import logging
 
@@ -9,135 +12,215 @@ from .database import Database
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True)
+class _UserSessions:
+    """Active session ids for one user (slots: two fields, no dict)."""
+    game: Optional[int] = None
+    spotify: Optional[int] = None
+
+
 class ActivityTracker:
     """Tracks user activities across Discord."""
-    
+
+    # Seconds a game must stay active before its session is persisted;
+    # launchers and crash-restarts flicker well inside this window
+    GAME_START_DEBOUNCE = 30.0
+
     def __init__(self, db: Database):
         self.db = db
-        self.active_sessions: Dict[int, Dict[str, int]] = {}
-    
+        self.active_sessions: Dict[int, _UserSessions] = {}
+        # user_id -> (game_name, start_time, username, timer handle)
+        self._pending_game_starts: Dict[int, tuple] = {}
+        # user_id -> last (username, display_name, avatar_url) written to
+        # the database; profiles change rarely, so most presence events
+        # can skip the upsert entirely
+        self._profile_cache: Dict[int, Tuple[str, str, Optional[str]]] = {}
+        # Exception types already logged with a full traceback
+        self._seen_exc_types: set = set()
+
+    async def handle_presence_updates_batch(self, updates):
+        """Handle a batch of coalesced (before, after) presence updates.
+
+        Each update is handled in its own try/except so one member's
+        failure can't drop the rest of the batch. Full tracebacks are
+        expensive; emit one per exception type so error storms can't
+        amplify themselves in the log.
+        """
+        for before, after in updates:
+            try:
+                await self.handle_presence_update(before, after)
+            except Exception as e:
+                exc_type = type(e)
+                if exc_type in self._seen_exc_types:
+                    logger.warning("Presence update error (repeat): %s", e)
+                else:
+                    self._seen_exc_types.add(exc_type)
+                    logger.error("Presence update error: %s", e, exc_info=True)
+
     async def handle_presence_update(self, before: discord.Member, after: discord.Member):
         """Handle Discord presence updates."""
         user_id = after.id
+
+        # Compute the deltas before any database work; most updates that
+        # reach us change one activity kind, not both, and some change
+        # neither once compared in detail
+        before_game, before_spotify = self._extract_activities(before)
+        after_game, after_spotify = self._extract_activities(after)
+
+        if before_game == after_game and before_spotify == after_spotify:
+            return
+
+        # The user row only needs refreshing when we're about to record
+        # something for them and their profile actually changed
         avatar_url = after.display_avatar.url if after.display_avatar else None
-        
-        await self.db.upsert_user(user_id, after.name, after.display_name, avatar_url)
-        
+        profile = (after.name, after.display_name, avatar_url)
+        if self._profile_cache.get(user_id) != profile:
+            await self.db.upsert_user(user_id, *profile)
+            self._profile_cache[user_id] = profile
+
         if user_id not in self.active_sessions:
-            self.active_sessions[user_id] = {'game': None, 'spotify': None}
-        
-        await self._handle_game_activity(before, after, user_id)
-        await self._handle_spotify_activity(before, after, user_id)
-    
-    async def _handle_game_activity(self, before: discord.Member, after: discord.Member, user_id: int):
-        """Handle game playing activity."""
-        before_game = self._get_playing_activity(before)
-        after_game = self._get_playing_activity(after)
-        
-        if before_game == after_game:
-            return
-        
-        if before_game and before_game != after_game:
-            await self._end_game_session(user_id, after.name, before_game)
-        
-        if after_game and after_game != before_game:
-            await self._start_game_session(user_id, after.name, after_game)
-    
-    async def _handle_spotify_activity(self, before: discord.Member, after: discord.Member, user_id: int):
-        """Handle Spotify listening activity."""
-        before_spotify = self._get_spotify_activity(before)
-        after_spotify = self._get_spotify_activity(after)
-        
-        if before_spotify == after_spotify:
-            return
-        
-        if before_spotify and before_spotify != after_spotify:
-            await self._end_spotify_session(user_id, after.name, before_spotify)
-        
-        if after_spotify and after_spotify != before_spotify:
-            await self._start_spotify_session(user_id, after.name, after_spotify)
-    
-    def _get_playing_activity(self, member: discord.Member) -> Optional[str]:
-        """Extract game name from activities."""
-        if not member or not member.activities:
-            return None
-        
-        for activity in member.activities:
-            if activity.type == discord.ActivityType.playing:
-                return activity.name
-        
-        return None
+            self.active_sessions[user_id] = _UserSessions()
+
+        if before_game != after_game:
+            await self._handle_game_activity(before_game, after_game, user_id, after.name)
+        if before_spotify != after_spotify:
+            await self._handle_spotify_activity(before_spotify, after_spotify, user_id, after.name)
+
+    async def _handle_game_activity(self, before_game: Optional[str], after_game: Optional[str],
+                                    user_id: int, username: str):
+        """Handle a change in game playing activity (values pre-extracted by caller)."""
+        if before_game:
+            # A start still inside its debounce window was a flicker;
+            # drop it without the session ever touching the database
+            pending = self._cancel_pending_game_start(user_id)
+            if pending is None or pending[0] != before_game:
+                await self._end_game_session(user_id, username, before_game)
+
+        if after_game:
+            self._schedule_game_start(user_id, username, after_game)
+
+    async def _handle_spotify_activity(self, before_spotify: Optional[Tuple[str, str, str]],
+                                       after_spotify: Optional[Tuple[str, str, str]],
+                                       user_id: int, username: str):
+        """Handle a change in Spotify listening activity (values pre-extracted by caller)."""
+        if before_spotify:
+            await self._end_spotify_session(user_id, username, before_spotify)
+
+        if after_spotify:
+            await self._start_spotify_session(user_id, username, after_spotify)
     
-    def _get_spotify_activity(self, member: discord.Member) -> Optional[Tuple[str, str, str]]:
-        """Extract Spotify info (title, artist, album)."""
+    def _extract_activities(self, member: discord.Member) -> Tuple[Optional[str], Optional[Tuple[str, str, str]]]:
+        """Extract (game_name, spotify_info) in a single pass over activities."""
         if not member or not member.activities:
-            return None
-        
+            return None, None
+
+        game_name = None
+        spotify_info = None
         for activity in member.activities:
-            if isinstance(activity, discord.Spotify):
-                return (activity.title, activity.artist, activity.album or "Unknown Album")
-        
-        return None
-    
-    async def _start_game_session(self, user_id: int, username: str, game_name: str):
+            if spotify_info is None and isinstance(activity, discord.Spotify):
+                spotify_info = (activity.title, activity.artist, activity.album or "Unknown Album")
+            elif game_name is None and activity.type == discord.ActivityType.playing:
+                game_name = activity.name
+            if game_name is not None and spotify_info is not None:
+                break
+
+        return game_name, spotify_info
+
+    def _schedule_game_start(self, user_id: int, username: str, game_name: str):
+        """Queue a game start to be persisted after the debounce window.
+
+        The wall-clock start is recorded now, so the session is backdated
+        to the real launch time when it is finally written.
+        """
+        self._cancel_pending_game_start(user_id)
+        start_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        handle = asyncio.get_running_loop().call_later(
+            self.GAME_START_DEBOUNCE,
+            lambda: asyncio.create_task(self._flush_game_start(user_id)),
+        )
+        self._pending_game_starts[user_id] = (game_name, start_time, username, handle)
+
+    def _cancel_pending_game_start(self, user_id: int) -> Optional[tuple]:
+        """Drop a not-yet-persisted game start, returning it if one existed."""
+        pending = self._pending_game_starts.pop(user_id, None)
+        if pending is not None:
+            pending[3].cancel()
+        return pending
+
+    async def _flush_game_start(self, user_id: int):
+        """Persist a debounced game start once the window has passed."""
+        pending = self._pending_game_starts.pop(user_id, None)
+        if pending is None:
+            return
+        game_name, start_time, username, _ = pending
+        await self._start_game_session(user_id, username, game_name, start_time)
+
+    async def _start_game_session(self, user_id: int, username: str, game_name: str, start_time: Optional[str] = None):
         """Start game session."""
         try:
-            session_id = await self.db.start_game_session(user_id, game_name)
-            self.active_sessions[user_id]['game'] = session_id
-            logger.info(f"{username}: started {game_name}")
+            session_id = await self.db.start_game_session(user_id, game_name, start_time)
+            self.active_sessions[user_id].game = session_id
+            logger.info("%s: started %s", username, game_name)
         except Exception as e:
-            logger.error(f"Error starting game session: {e}")
+            logger.error("Error starting game session: %s", e)
     
     async def _end_game_session(self, user_id: int, username: str, game_name: str):
         """End game session."""
-        session_id = self.active_sessions[user_id].get('game')
+        session_id = self.active_sessions[user_id].game
         if session_id:
             try:
                 await self.db.end_game_session(session_id)
-                self.active_sessions[user_id]['game'] = None
-                logger.info(f"{username}: stopped {game_name}")
+                self.active_sessions[user_id].game = None
+                logger.info("%s: stopped %s", username, game_name)
             except Exception as e:
-                logger.error(f"Error ending game session: {e}")
+                logger.error("Error ending game session: %s", e)
     
     async def _start_spotify_session(self, user_id: int, username: str, track_info: Tuple[str, str, str]):
         """Start Spotify session."""
         try:
             title, artist, album = track_info
             session_id = await self.db.start_spotify_session(user_id, title, artist, album)
-            self.active_sessions[user_id]['spotify'] = session_id
-            logger.info(f"{username}: {title} - {artist}")
+            self.active_sessions[user_id].spotify = session_id
+            logger.info("%s: %s - %s", username, title, artist)
         except Exception as e:
-            logger.error(f"Error starting Spotify session: {e}")
+            logger.error("Error starting Spotify session: %s", e)
     
     async def _end_spotify_session(self, user_id: int, username: str, track_info: Tuple[str, str, str]):
         """End Spotify session."""
-        session_id = self.active_sessions[user_id].get('spotify')
+        session_id = self.active_sessions[user_id].spotify
         if session_id:
             try:
                 await self.db.end_spotify_session(session_id)
-                self.active_sessions[user_id]['spotify'] = None
+                self.active_sessions[user_id].spotify = None
             except Exception as e:
-                logger.error(f"Error ending Spotify session: {e}")
+                logger.error("Error ending Spotify session: %s", e)
     
     async def cleanup_active_sessions(self):
         """Clean up active sessions on shutdown."""
-        session_count = sum(1 for s in self.active_sessions.values() if s.get('game') or s.get('spotify'))
-        if session_count > 0:
-            logger.info(f"Saving {session_count} active session(s)...")
-        
-        for user_id, sessions in self.active_sessions.items():
-            if sessions.get('game'):
-                try:
-                    await self.db.end_game_session(sessions['game'])
-                except Exception as e:
-                    logger.error(f"Error saving game session: {e}")
-            
-            if sessions.get('spotify'):
-                try:
-                    await self.db.end_spotify_session(sessions['spotify'])
-                except Exception as e:
-                    logger.error(f"Error saving Spotify session: {e}")
-        
+        # Persist debounced starts first (with their real start time) so
+        # a game launched just before shutdown still counts
+        for user_id, (game_name, start_time, username, handle) in list(self._pending_game_starts.items()):
+            handle.cancel()
+            await self._start_game_session(user_id, username, game_name, start_time)
+        self._pending_game_starts.clear()
+
+        game_ids = [s.game for s in self.active_sessions.values() if s.game]
+        spotify_ids = [s.spotify for s in self.active_sessions.values() if s.spotify]
+        if game_ids or spotify_ids:
+            logger.info("Saving %d active session(s)...", len(game_ids) + len(spotify_ids))
+
+        # One UPDATE per table instead of one commit per session; both
+        # writes go through the same writer connection so gather just
+        # overlaps their thread hops
+        results = await asyncio.gather(
+            self.db.bulk_end_game_sessions(game_ids),
+            self.db.bulk_end_spotify_sessions(spotify_ids),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("Error saving sessions: %s", result)
+
         self.active_sessions.clear()
     
     async def initialize_from_current_state(self, bot, guild_id: Optional[int] = None):
@@ -158,95 +241,113 @@ class ActivityTracker:
             logger.info("No orphaned sessions found")
         else:
             logger.warning(
-                f"Found {len(orphaned_games)} orphaned game sessions and "
-                f"{len(orphaned_spotify)} orphaned Spotify sessions from previous run"
+                "Found %d orphaned game sessions and %d orphaned Spotify sessions from previous run",
+                len(orphaned_games), len(orphaned_spotify)
             )
         
         recovered_sessions = {'games': 0, 'spotify': 0}
-        closed_sessions = {'games': 0, 'spotify': 0}
-        
+
         logger.info("Scanning current Discord activity...")
-        
-        active_games = 0
-        active_spotify = 0
-        
-        # Build lookup maps for ALL orphaned sessions
-        user_game_sessions = {(user_id, game_id): (session_id, user_id, game_id) for session_id, user_id, game_id in orphaned_games}
-        user_spotify_sessions = {(user_id, track_id): (session_id, user_id, track_id) for session_id, user_id, track_id in orphaned_spotify}
-        
+
+        # Build lookup maps for ALL orphaned sessions, keyed by the names
+        # we see in Discord activities so matching needs no id resolution
+        user_game_sessions = {(user_id, game_name): session_id for session_id, user_id, game_name in orphaned_games}
+        user_spotify_sessions = {(user_id, title, artist): session_id for session_id, user_id, title, artist in orphaned_spotify}
+
         # Filter guilds by guild_id if specified
         guilds = [g for g in bot.guilds if guild_id is None or g.id == guild_id]
-        
+
+        # Pass 1: walk the member cache without awaiting, collecting user
+        # rows and current activities
+        user_rows = []
+        game_members = []      # (member, game_name)
+        spotify_members = []   # (member, (title, artist, album))
+        seen_users = set()
         for guild in guilds:
             for member in guild.members:
-                if member.bot:
+                if member.bot or member.id in seen_users:
                     continue
+                seen_users.add(member.id)
                 
-                user_id = member.id
                 avatar_url = member.display_avatar.url if member.display_avatar else None
-                await self.db.upsert_user(user_id, member.name, member.display_name, avatar_url)
-                
-                if user_id not in self.active_sessions:
-                    self.active_sessions[user_id] = {'game': None, 'spotify': None}
+                profile = (member.name, member.display_name, avatar_url)
+                if self._profile_cache.get(member.id) != profile:
+                    user_rows.append((member.id, *profile))
+                    self._profile_cache[member.id] = profile
+
+                if member.id not in self.active_sessions:
+                    self.active_sessions[member.id] = _UserSessions()
                 
-                # Handle game activity - try to recover or start new
-                game_name = self._get_playing_activity(member)
+                game_name, spotify_info = self._extract_activities(member)
                 if game_name:
-                    game_id = await self.db.get_or_create_game(game_name)
-                    session_key = (user_id, game_id)
-                    
-                    # Check if we can recover an orphaned session
-                    if session_key in user_game_sessions:
-                        session_id, _, _ = user_game_sessions[session_key]
-                        self.active_sessions[user_id]['game'] = session_id
-                        logger.info(f"Recovered game session for {member.name}: {game_name}")
-                        recovered_sessions['games'] += 1
-                        del user_game_sessions[session_key]  # Mark as recovered
-                    else:
-                        # Start new session (no matching orphaned session)
-                        await self._start_game_session(user_id, member.name, game_name)
-                    active_games += 1
-                
-                # Handle Spotify activity - try to recover or start new
-                spotify_info = self._get_spotify_activity(member)
+                    game_members.append((member, game_name))
                 if spotify_info:
-                    title, artist, album = spotify_info
-                    track_id = await self.db.get_or_create_track(title, artist, album)
-                    session_key = (user_id, track_id)
-                    
-                    # Check if we can recover an orphaned session
-                    if session_key in user_spotify_sessions:
-                        session_id, _, _ = user_spotify_sessions[session_key]
-                        self.active_sessions[user_id]['spotify'] = session_id
-                        logger.info(f"Recovered Spotify session for {member.name}: {title}")
-                        recovered_sessions['spotify'] += 1
-                        del user_spotify_sessions[session_key]  # Mark as recovered
-                    else:
-                        # Start new session (no matching orphaned session)
-                        await self._start_spotify_session(user_id, member.name, spotify_info)
-                    active_spotify += 1
-        
-        # Close remaining orphaned sessions that weren't recovered
-        # These are sessions where the user is no longer doing that activity
-        for session_id, user_id, game_id in user_game_sessions.values():
-            await self.db.end_game_session(session_id)
-            closed_sessions['games'] += 1
-        
-        for session_id, user_id, track_id in user_spotify_sessions.values():
-            await self.db.end_spotify_session(session_id)
-            closed_sessions['spotify'] += 1
+                    spotify_members.append((member, spotify_info))
+
+        # Bulk write: one transaction instead of one commit per member,
+        # which matters with a large cached member list
+        await self.db.bulk_upsert_users(user_rows)
+
+        # Pass 2: recover orphans where they match - a pure dict lookup,
+        # no database work - and batch-start the rest (recovery bypasses
+        # the start debounce on purpose - these activities were already
+        # running before the restart)
+        new_game_starts = []
+        for member, game_name in game_members:
+            session_key = (member.id, game_name)
+            if session_key in user_game_sessions:
+                self.active_sessions[member.id].game = user_game_sessions.pop(session_key)
+                logger.info("Recovered game session for %s: %s", member.name, game_name)
+                recovered_sessions['games'] += 1
+            else:
+                new_game_starts.append((member.id, game_name))
+
+        if new_game_starts:
+            session_ids = await self.db.bulk_start_game_sessions(new_game_starts)
+            for (user_id, _), session_id in zip(new_game_starts, session_ids):
+                self.active_sessions[user_id].game = session_id
+
+        new_spotify_starts = []
+        for member, spotify_info in spotify_members:
+            title, artist, album = spotify_info
+            session_key = (member.id, title, artist)
+            if session_key in user_spotify_sessions:
+                self.active_sessions[member.id].spotify = user_spotify_sessions.pop(session_key)
+                logger.info("Recovered Spotify session for %s: %s", member.name, title)
+                recovered_sessions['spotify'] += 1
+            else:
+                new_spotify_starts.append((member, spotify_info))
+
+        if new_spotify_starts:
+            # One transaction creates the genuinely new tracks and warms
+            # the track cache, so the session starts below don't SELECT
+            await self.db.bulk_get_or_create_tracks([info for _, info in new_spotify_starts])
+            for member, spotify_info in new_spotify_starts:
+                await self._start_spotify_session(member.id, member.name, spotify_info)
+
+        active_games = len(game_members)
+        active_spotify = len(spotify_members)
+
+        # Close remaining orphaned sessions that weren't recovered, one
+        # UPDATE per table; cap their duration so a long outage doesn't
+        # credit the whole downtime as playtime
+        closed_sessions = {'games': len(user_game_sessions), 'spotify': len(user_spotify_sessions)}
+        await self.db.bulk_close_orphaned_with_cap(
+            'game_sessions', list(user_game_sessions.values()))
+        await self.db.bulk_close_orphaned_with_cap(
+            'spotify_sessions', list(user_spotify_sessions.values()))
         
         # Log summary
         if recovered_sessions['games'] > 0 or recovered_sessions['spotify'] > 0:
             logger.info(
-                f"Recovered {recovered_sessions['games']} game and "
-                f"{recovered_sessions['spotify']} Spotify sessions from restart"
+                "Recovered %d game and %d Spotify sessions from restart",
+                recovered_sessions['games'], recovered_sessions['spotify']
             )
         
         if closed_sessions['games'] > 0 or closed_sessions['spotify'] > 0:
             logger.info(
-                f"Properly closed {closed_sessions['games']} game and "
-                f"{closed_sessions['spotify']} Spotify sessions (users no longer active)"
+                "Properly closed %d game and %d Spotify sessions (users no longer active)",
+                closed_sessions['games'], closed_sessions['spotify']
             )
         
-        logger.info(f"Tracking {len(self.active_sessions)} users ({active_games} gaming, {active_spotify} listening)")
+        logger.info("Tracking %d users (%d gaming, %d listening)", len(self.active_sessions), active_games, active_spotify)
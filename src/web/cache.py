@@ -0,0 +1,62 @@
+"""Tiny in-process TTL cache for dashboard data."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+# Some cache keys embed request parameters (player id, game name), so the
+# key space is unbounded; cap the store so a scanner walking URLs can't
+# grow the process without limit
+MAX_ENTRIES = 256
+
+_store: Dict[str, Tuple[float, Any]] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _prune(now: float):
+    """Drop expired entries; evict the soonest-expiring ones when over cap."""
+    for key in [k for k, (expires, _) in _store.items() if expires <= now]:
+        del _store[key]
+    while len(_store) >= MAX_ENTRIES:
+        del _store[min(_store, key=lambda k: _store[k][0])]
+
+
+async def cached(key: str, ttl: float, producer: Callable[[], Awaitable[Any]]) -> Any:
+    """Return the cached value for `key`, running `producer` at most once per ttl.
+
+    A per-key lock prevents a stampede: when an entry expires under load,
+    one caller runs the producer while concurrent callers for the same key
+    wait and reuse its result instead of hitting the database in parallel.
+
+    `None` results are returned but never stored, so misses on
+    parameterized endpoints (unknown player ids, probed game names) don't
+    allocate cache entries.
+    """
+    entry = _store.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+
+    lock = _locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            # Re-check: another waiter may have refreshed while we queued
+            entry = _store.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            value = await producer()
+            if value is not None:
+                now = time.monotonic()
+                _prune(now)
+                _store[key] = (now + ttl, value)
+            return value
+    finally:
+        # Locks only matter while a producer is in flight; dropping the
+        # entry afterwards keeps _locks from growing with the key space
+        # (waiters already holding this lock object are unaffected)
+        _locks.pop(key, None)
+
+
+def clear():
+    """Drop all cached entries (test hook)."""
+    _store.clear()
+    _locks.clear()
@@ -1,5 +1,7 @@
 """FastAPI web server for LAN Party Stats."""
 
+import asyncio
+import re
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.templating import Jinja2Templates
@@ -13,87 +15,114 @@ import os
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from bot.database import Database
 from bot.stats import StatsManager
+from web.cache import cached
 
 logger = logging.getLogger(__name__)
 
-# Database and stats manager
-db: Database = None
-stats: StatsManager = None
+# Stats change at presence-update cadence, so short TTLs keep pages fresh
+# while collapsing dashboard refresh bursts to one query per window
+PAGE_TTL = 10.0
+PARTIAL_TTL = 3.0
+_PAGE_HEADERS = {"Cache-Control": f"public, max-age={int(PAGE_TTL)}"}
+_PARTIAL_HEADERS = {"Cache-Control": f"public, max-age={int(PARTIAL_TTL)}"}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan (startup and shutdown)."""
-    # Startup
-    global db, stats
+    # Startup: per-app-instance state instead of module globals, so each
+    # worker process owns its connections (the aiosqlite read pool inside
+    # Database already provides per-process query concurrency)
     logger.info("Starting web server...")
     db_path = os.getenv("DATABASE_PATH", "stats.db")
-    db = Database(db_path)
-    await db.connect()
-    stats = StatsManager(db)
+    app.state.db = Database(db_path)
+    await app.state.db.connect()
+    app.state.stats = StatsManager(app.state.db)
     logger.info("Web server initialized")
     
     yield
     
     # Shutdown
-    if db:
-        await db.close()
+    await app.state.db.close()
     logger.info("Web server shutdown")
 
 
 app = FastAPI(title="LAN Party Stats", lifespan=lifespan)
 
+# Content-hashed filenames (e.g. style.3f2a9c1b.css) never change, so they
+# can be cached forever; everything else gets a short max-age and relies on
+# the ETag/Last-Modified that Starlette already emits for 304 revalidation
+_HASHED_ASSET = re.compile(r"\.[0-9a-f]{8,}\.")
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that sets Cache-Control so browsers stop re-fetching assets."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if _HASHED_ASSET.search(Path(str(full_path)).name):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "public, max-age=60"
+        return response
+
+
 # Setup static files and templates
 static_dir = Path(__file__).parent.parent.parent / "static"
 templates_dir = Path(__file__).parent.parent.parent / "templates"
 
-app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+app.mount("/static", CachedStaticFiles(directory=str(static_dir)), name="static")
 templates = Jinja2Templates(directory=str(templates_dir))
 
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     """Main dashboard page."""
-    overview = await stats.get_overview_stats()
-    top_games = await stats.get_top_games(5)
-    top_tracks = await stats.get_top_spotify_tracks(5)
-    
-    return templates.TemplateResponse("index.html", {
-        "request": request,
+    stats = request.app.state.stats
+    async def produce():
+        # Independent reads served concurrently from the read pool
+        return await asyncio.gather(
+            stats.get_overview_stats(),
+            stats.get_top_games(5),
+            stats.get_top_spotify_tracks(5),
+        )
+
+    overview, top_games, top_tracks = await cached("index", PAGE_TTL, produce)
+
+    return templates.TemplateResponse(request, "index.html", {
         "overview": overview,
         "top_games": top_games,
         "top_tracks": top_tracks,
         "page": "home"
-    })
+    }, headers=_PAGE_HEADERS)
 
 
 @app.get("/leaderboard", response_class=HTMLResponse)
 async def leaderboard(request: Request):
     """Player leaderboard page."""
-    leaders = await stats.get_leaderboard(25)
+    stats = request.app.state.stats
+    leaders = await cached("leaderboard:25", PAGE_TTL, lambda: stats.get_leaderboard(25))
     
-    return templates.TemplateResponse("leaderboard.html", {
-        "request": request,
+    return templates.TemplateResponse(request, "leaderboard.html", {
         "leaders": leaders,
         "page": "leaderboard"
-    })
+    }, headers=_PAGE_HEADERS)
 
 
 @app.get("/games", response_class=HTMLResponse)
 async def games(request: Request):
     """Top games page."""
+    stats = request.app.state.stats
     try:
-        top_games = await stats.get_top_games(25)
+        top_games = await cached("games:25", PAGE_TTL, lambda: stats.get_top_games(25))
         
-        return templates.TemplateResponse("games.html", {
-            "request": request,
+        return templates.TemplateResponse(request, "games.html", {
             "games": top_games,
             "page": "games"
-        })
+        }, headers=_PAGE_HEADERS)
     except Exception as e:
         logger.error(f"Error loading games: {e}")
-        return templates.TemplateResponse("404.html", {
-            "request": request,
+        return templates.TemplateResponse(request, "404.html", {
             "message": "Error loading games"
         }, status_code=500)
 
@@ -101,69 +130,88 @@ async def games(request: Request):
 @app.get("/spotify", response_class=HTMLResponse)
 async def spotify(request: Request):
     """Top Spotify tracks page."""
-    top_tracks = await stats.get_top_spotify_tracks(25)
+    stats = request.app.state.stats
+    top_tracks = await cached("spotify:25", PAGE_TTL, lambda: stats.get_top_spotify_tracks(25))
     
-    return templates.TemplateResponse("spotify.html", {
-        "request": request,
+    return templates.TemplateResponse(request, "spotify.html", {
         "tracks": top_tracks,
         "page": "spotify"
-    })
+    }, headers=_PAGE_HEADERS)
 
 
 @app.get("/player/{user_id}", response_class=HTMLResponse)
 async def player_stats(request: Request, user_id: int):
     """Individual player statistics page."""
-    player = await stats.get_player_stats(user_id)
-    spotify = await stats.get_user_spotify_stats(user_id)
-    
-    if not player:
-        return templates.TemplateResponse("404.html", {
-            "request": request,
+    stats = request.app.state.stats
+    async def produce():
+        # Independent reads; overlap them on the read pool. Unknown ids
+        # produce None so the miss is never cached
+        player, spotify = await asyncio.gather(
+            stats.get_player_stats(user_id),
+            stats.get_user_spotify_stats(user_id),
+        )
+        return (player, spotify) if player else None
+
+    result = await cached(f"player:{user_id}", PAGE_TTL, produce)
+
+    if not result:
+        return templates.TemplateResponse(request, "404.html", {
             "message": f"Player not found"
         }, status_code=404)
+    player, spotify = result
     
-    return templates.TemplateResponse("player.html", {
-        "request": request,
+    return templates.TemplateResponse(request, "player.html", {
         "player": player,
         "spotify": spotify,
         "page": "player"
-    })
+    }, headers=_PAGE_HEADERS)
 
 
 @app.get("/game/{game_name:path}", response_class=HTMLResponse)
 async def game_details(request: Request, game_name: str):
     """Individual game statistics page."""
-    game = await stats.get_game_details(game_name)
+    stats = request.app.state.stats
+    game = await cached(f"game:{game_name}", PAGE_TTL, lambda: stats.get_game_details(game_name))
     
     if not game:
-        return templates.TemplateResponse("404.html", {
-            "request": request,
+        return templates.TemplateResponse(request, "404.html", {
             "message": f"Game not found"
         }, status_code=404)
     
-    return templates.TemplateResponse("game.html", {
-        "request": request,
+    return templates.TemplateResponse(request, "game.html", {
         "game": game,
         "page": "games"
-    })
+    }, headers=_PAGE_HEADERS)
 
 
 # HTMX partial endpoints for live updates
 @app.get("/htmx/overview-stats")
 async def htmx_overview_stats(request: Request):
-    """HTMX endpoint for overview stats."""
-    overview = await stats.get_overview_stats()
-    return templates.TemplateResponse("partials/overview_stats.html", {
-        "request": request,
-        "overview": overview
-    })
+    """HTMX endpoint for overview stats.
+
+    The rendered HTML itself is cached: warm hits skip both the query and
+    the Jinja render, which is most of the cost at poll frequency.
+    """
+    stats = request.app.state.stats
+
+    async def produce():
+        overview = await stats.get_overview_stats()
+        return templates.get_template("partials/overview_stats.html").render(overview=overview)
+
+    html = await cached("htmx:overview", PARTIAL_TTL, produce)
+    return HTMLResponse(html, headers=_PARTIAL_HEADERS)
 
 
 @app.get("/htmx/leaderboard")
 async def htmx_leaderboard(request: Request, limit: int = 10):
-    """HTMX endpoint for leaderboard."""
-    leaders = await stats.get_leaderboard(limit)
-    return templates.TemplateResponse("partials/leaderboard_table.html", {
-        "request": request,
-        "leaders": leaders
-    })
+    """HTMX endpoint for leaderboard (rendered HTML cached, see above)."""
+    stats = request.app.state.stats
+    # Clamp so the query param can't request huge pages or mint cache keys
+    limit = max(1, min(limit, 50))
+
+    async def produce():
+        leaders = await stats.get_leaderboard(limit)
+        return templates.get_template("partials/leaderboard_table.html").render(leaders=leaders)
+
+    html = await cached(f"htmx:leaderboard:{limit}", PARTIAL_TTL, produce)
+    return HTMLResponse(html, headers=_PARTIAL_HEADERS)
@@ -1,7 +1,10 @@
 """Web server entry point for LAN Party Stats."""
 
+import atexit
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from dotenv import load_dotenv
 import sys
@@ -11,31 +14,69 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 def setup_logging():
     """Configure logging for the web server."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('web.log')
-        ]
+    formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    file_handler = RotatingFileHandler(
+        'web.log', maxBytes=5_000_000, backupCount=3, delay=True, encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+
+    # Route records through a queue so console/file writes happen on a
+    # background thread instead of blocking the event loop (same pattern
+    # as the bot entry point)
+    log_queue = queue.SimpleQueue()
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.handlers.clear()
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
 
 def main():
     setup_logging()
     load_dotenv()
-    
+
     port = int(os.getenv("WEB_PORT", "5000"))
-    
-    logging.info(f"Starting web server on 0.0.0.0:{port}")
-    
+    # Each worker opens its own SQLite connections (WAL handles the
+    # concurrent readers), so scaling out is opt-in via WEB_WORKERS
+    workers = int(os.getenv("WEB_WORKERS", "1"))
+
+    logging.info("Starting web server on 0.0.0.0:%d (%d worker(s))", port, workers)
+
     import uvicorn
-    from web.server import app
-    
+
+    # uvicorn[standard] ships uvloop and httptools; fall back to the
+    # stdlib implementations when only the base install is present
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "auto"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "auto"
+
+    # Import string + app_dir (not the app object) so worker processes
+    # can resolve the application themselves
     uvicorn.run(
-        app,
+        "web.server:app",
         host="0.0.0.0",
         port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        app_dir=str(Path(__file__).parent / "src"),
         log_level="info"
     )
 